@@ -1,15 +1,31 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory, Response, g
 import numpy as np
 import cv2
 import tensorflow as tf
 import os
 from flask_cors import CORS
-import traceback
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 from scipy import stats
 from datetime import datetime
 import hashlib
 import json
+import logging
+import threading
+import time
+import io
+import uuid
+import zipfile
+from contextlib import ExitStack, nullcontext
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from features import FeaturePool, ImageTooLarge, decode_image as decode_image_bytes, image_to_tensor
+from indexes import ChildIndex, ReportIndex, encode_cursor, decode_cursor
+from history import TestHistory
+from responses import Compressor, FastJSONProvider, ResponseCache
+from metrics import Registry
+from logs import setup_logging, redact
+from storage import GroupCommit, open_store, set_record, update_record, append_record, push_record
+from inference import BatchingPredictor, PredictionCache, KerasBackend, load_backend
 
 app = Flask(__name__, static_folder="frontend/dist", static_url_path="/")
 
@@ -18,15 +34,104 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 
 app.secret_key = 'your-secret-key-here'
 
+# Compact responses through orjson when installed (TestHistory columns go out as plain lists)
+app.json = FastJSONProvider(app)
+
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+# Storage backend for parents/teachers/children/reports: journal (default) or json
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'journal').lower()
+JOURNAL_COMPACT_BYTES = int(os.environ.get('JOURNAL_COMPACT_BYTES', 1024 * 1024))
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'data/mindtrack.db')
+# Low-priority updates (login lastActivity, parent assessments) are written in batches:
+# every WRITE_COALESCE_INTERVAL seconds or WRITE_COALESCE_MAX_PENDING records (0 = write at once)
+WRITE_COALESCE_INTERVAL = float(os.environ.get('WRITE_COALESCE_INTERVAL', 2.0))
+WRITE_COALESCE_MAX_PENDING = int(os.environ.get('WRITE_COALESCE_MAX_PENDING', 100))
+
+# Micro-batching of concurrent predictions (see inference.BatchingPredictor)
+PREDICT_MAX_BATCH_SIZE = int(os.environ.get('PREDICT_MAX_BATCH_SIZE', 16))
+PREDICT_MAX_WAIT_MS = float(os.environ.get('PREDICT_MAX_WAIT_MS', 5))
+
+# Prediction cache for repeat uploads (disk tier is shared across workers when set)
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 512))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+PREDICTION_CACHE_DIR = os.environ.get('PREDICTION_CACHE_DIR', '')
+PREDICTION_CACHE_DISK_MAX_ENTRIES = int(os.environ.get('PREDICTION_CACHE_DISK_MAX_ENTRIES', 10000))
+PREDICTION_CACHE_DISK_MAX_BYTES = int(os.environ.get('PREDICTION_CACHE_DISK_MAX_BYTES', 64 * 1024 * 1024))
+
+# Serialized bodies of polled read endpoints, reused until the data behind them changes
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+RESPONSE_CACHE_BYTES = int(os.environ.get('RESPONSE_CACHE_BYTES', 64 * 1024 * 1024))
+# JSON responses at least this large are gzip/brotli compressed when the client accepts it (0 = never)
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+
+# Inference backend: keras (model.predict), compiled (tf.function) or tflite
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras').lower()
+TFLITE_MODEL_PATH = os.environ.get('TFLITE_MODEL_PATH', '')
+TFLITE_NUM_THREADS = int(os.environ['TFLITE_NUM_THREADS']) if os.environ.get('TFLITE_NUM_THREADS') else None
+
+# Model loading runs on a background thread unless MODEL_BACKGROUND_LOAD=0
+MODEL_BACKGROUND_LOAD = os.environ.get('MODEL_BACKGROUND_LOAD', '1') != '0'
+MODEL_RETRY_AFTER = int(os.environ.get('MODEL_RETRY_AFTER', 5))
+
+# Upload limits and decode resolution
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 20 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 50_000_000))
+DECODE_PIXEL_BUDGET = int(os.environ.get('DECODE_PIXEL_BUDGET', 4_000_000))
+# Square resolution handwriting features are computed at (0 = full decoded resolution)
+FEATURE_WORKING_SIZE = int(os.environ.get('FEATURE_WORKING_SIZE', 224))
+
+# Preprocessing/feature extraction pool: none (request thread), thread or process
+FEATURE_POOL = os.environ.get('FEATURE_POOL', 'thread').lower()
+FEATURE_WORKERS = int(os.environ.get('FEATURE_WORKERS', os.cpu_count() or 1))
+
+# Bulk prediction (/api/predict-batch)
+MAX_BATCH_FILES = int(os.environ.get('MAX_BATCH_FILES', 100))
+MAX_BATCH_BYTES = int(os.environ.get('MAX_BATCH_BYTES', 200 * 1024 * 1024))
+BATCH_PREP_WORKERS = int(os.environ.get('BATCH_PREP_WORKERS', os.cpu_count() or 1))
+
+# Larger request bodies are refused with 413 before Werkzeug parses or buffers them;
+# /api/predict-batch raises its own limit to MAX_BATCH_BYTES. The overhead leaves
+# room for multipart boundaries and the other form fields.
+MULTIPART_OVERHEAD = 64 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+
+# Logging: level, json or text records, and per-route sampling of debug/info records ("route=rate,*=rate")
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')
+
 # Create necessary directories if they don't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs('static/css', exist_ok=True)
 os.makedirs('data', exist_ok=True)
 
+# Records are written by a background thread, never on the request path
+log, log_sampler = setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES)
+
+# Prometheus metrics for this process, served from /metrics
+metrics_registry = Registry()
+request_seconds = metrics_registry.histogram(
+    'mindtrack_request_duration_seconds', 'Time to produce a response, by route', ('route', 'method'))
+requests_total = metrics_registry.counter(
+    'mindtrack_requests_total', 'Requests served, by route and status', ('route', 'method', 'status'))
+request_errors = metrics_registry.counter(
+    'mindtrack_request_errors_total', 'Requests that failed with a 5xx or an unhandled exception', ('route',))
+requests_in_flight = metrics_registry.gauge(
+    'mindtrack_requests_in_flight', 'Requests being handled right now', ('route',))
+stage_seconds = metrics_registry.histogram(
+    'mindtrack_prediction_stage_seconds',
+    'Prediction pipeline stages: receive, decode, extract_features, normalize, model_predict, serialize '
+    '(and receive_body under asgi)',
+    ('stage',))
+model_load_seconds = metrics_registry.gauge(
+    'mindtrack_model_load_seconds', 'Model startup time by phase (load, warmup, total)', ('phase',))
+
+def stage(name):
+    """Context manager timing one prediction pipeline stage"""
+    return stage_seconds.labels(name).time()
+
 
 @app.route('/')
 def serve():
@@ -41,6 +146,18 @@ def not_found(e):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def file_digest(path, chunk_size=1 << 20):
+    """Short SHA-256 digest of a file, used to version the loaded model"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def unique_id(prefix):
+    """prefix + timestamp + random suffix: two records created in the same second still get distinct ids"""
+    return f"{prefix}{int(datetime.now().timestamp())}{uuid.uuid4().hex[:6].upper()}"
+
 def hash_password(password):
     """Simple password hashing using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -49,57 +166,54 @@ def verify_password(password, hashed):
     """Verify password against hash"""
     return hash_password(password) == hashed
 
+# Storage engines: "journal" appends each change and compacts in the background,
+# "json" rewrites the whole file on every save, "sqlite" keeps everything in one WAL database
+STORE_OPTIONS = {'compact_bytes': JOURNAL_COMPACT_BYTES, 'sqlite_path': SQLITE_PATH}
+parents_store = open_store(STORAGE_BACKEND, 'data/parents.json', dict, **STORE_OPTIONS)
+teachers_store = open_store(STORAGE_BACKEND, 'data/teachers.json', dict, **STORE_OPTIONS)
+children_store = open_store(STORAGE_BACKEND, 'data/children.json', list, key_field='childId', **STORE_OPTIONS)
+teacher_reports_store = open_store(STORAGE_BACKEND, 'data/teacher_reports.json', list, key_field='reportId', **STORE_OPTIONS)
+
 def load_parents_data():
     """Load parents data from JSON file"""
-    try:
-        with open('data/parents.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    return parents_store.load()
 
-def save_parents_data(data):
-    """Save parents data to JSON file"""
-    with open('data/parents.json', 'w') as f:
-        json.dump(data, f, indent=2)
+def save_parents_data(data, *changes):
+    """Save parents data now, along with any deferred changes (journal them, or rewrite the file if none)"""
+    parents_writer.commit(*changes)
+
+def defer_parents_data(*changes):
+    """Queue low-priority parent changes for the next group commit"""
+    parents_writer.defer(*changes)
 
 def load_teachers_data():
     """Load teachers data from JSON file"""
-    try:
-        with open('data/teachers.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    return teachers_store.load()
 
-def save_teachers_data(data):
-    """Save teachers data to JSON file"""
-    with open('data/teachers.json', 'w') as f:
-        json.dump(data, f, indent=2)
+def save_teachers_data(data, *changes):
+    """Save teachers data now, along with any deferred changes (journal them, or rewrite the file if none)"""
+    teachers_writer.commit(*changes)
+
+def defer_teachers_data(*changes):
+    """Queue low-priority teacher changes for the next group commit"""
+    teachers_writer.defer(*changes)
 
 def load_children_data():
     """Load children data from JSON file"""
-    try:
-        with open('data/children.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return children_store.load()
 
-def save_children_data(data):
-    """Save children data to JSON file"""
-    with open('data/children.json', 'w') as f:
-        json.dump(data, f, indent=2)
+def save_children_data(data, *changes):
+    """Save children data (journal the given changes, or rewrite the file if none)"""
+    sync_child_index(children_store.save(data, changes))
 
 def load_teacher_reports_data():
     """Load teacher reports from JSON file"""
-    try:
-        with open('data/teacher_reports.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return teacher_reports_store.load()
 
-def save_teacher_reports_data(data):
-    """Save teacher reports to JSON file"""
-    with open('data/teacher_reports.json', 'w') as f:
-        json.dump(data, f, indent=2)
+def save_teacher_reports_data(data, *changes):
+    """Save teacher reports (journal the given changes, or rewrite the file if none)"""
+    count = len(data)
+    sync_report_index(teacher_reports_store.save(data, changes), count)
 
 # Load all data at startup - THIS WAS MISSING!
 parents = load_parents_data()
@@ -107,96 +221,142 @@ teachers = load_teachers_data()
 children_db = load_children_data()
 teacher_reports = load_teacher_reports_data()
 
-# Initialize with some sample children data if empty
-if not children_db:
-    sample_children = [
-        {"childId": "C001", "childName": "Alice Johnson", "age": "8", "grade": "3rd"},
-        {"childId": "C002", "childName": "Bob Smith", "age": "9", "grade": "4th"},
-        {"childId": "C003", "childName": "Charlie Brown", "age": "7", "grade": "2nd"},
-        {"childId": "C004", "childName": "Diana Prince", "age": "10", "grade": "5th"},
-        {"childId": "C005", "childName": "Ethan Hunt", "age": "8", "grade": "3rd"}
-    ]
-    children_db = sample_children
-    save_children_data(children_db)
-
-# Copy feature extraction functions locally to avoid circular import
-def extract_stroke_consistency(img):
-    """Measure stroke consistency based on intensity variations"""
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) > 2 else img
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-    edges = cv2.Canny(blurred, 50, 150)
-    if np.sum(edges) > 0:
-        return np.std(edges[edges > 0]) / 255.0
-    return 0.0
-
-def extract_letter_spacing(img):
-    """Measure letter spacing using horizontal projection"""
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) > 2 else img
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-    h_proj = np.sum(binary, axis=0) / 255.0
-    
-    peaks = []
-    for i in range(1, len(h_proj) - 1):
-        if h_proj[i] > h_proj[i-1] and h_proj[i] > h_proj[i+1] and h_proj[i] > 5:
-            peaks.append(i)
-
-    if len(peaks) > 1:
-        distances = [peaks[i+1] - peaks[i] for i in range(len(peaks) - 1)]
-        return np.std(distances) / img.shape[1]
-    return 0.0
-
-def extract_alignment(img):
-    """Measure alignment of text lines"""
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) > 2 else img
-    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-    v_proj = np.sum(binary, axis=1) / 255.0
-    
-    text_rows = [i for i, val in enumerate(v_proj) if val > binary.shape[1] * 0.1]
-
-    if text_rows:
-        lines = []
-        current_line = [text_rows[0]]
-
-        for i in range(1, len(text_rows)):
-            if text_rows[i] - text_rows[i-1] <= 2:
-                current_line.append(text_rows[i])
-            else:
-                if len(current_line) > 5:
-                    lines.append(current_line)
-                current_line = [text_rows[i]]
-
-        if len(current_line) > 5:
-            lines.append(current_line)
-
-        margins = []
-        for line in lines:
-            line_img = binary[min(line):max(line), :]
-            for col in range(line_img.shape[1]):
-                if np.sum(line_img[:, col]) > 0:
-                    margins.append(col)
-                    break
-
-        if len(margins) > 1:
-            return np.std(margins) / img.shape[1]
+parents_writer = GroupCommit(parents_store, parents, WRITE_COALESCE_INTERVAL, WRITE_COALESCE_MAX_PENDING)
+teachers_writer = GroupCommit(teachers_store, teachers, WRITE_COALESCE_INTERVAL, WRITE_COALESCE_MAX_PENDING)
 
-    return 0.0
-
-def extract_features(image):
-    """Extract multiple handwriting features from an image"""
-    features = {
-        'stroke_consistency': extract_stroke_consistency(image),
-        'letter_spacing': extract_letter_spacing(image),
-        'alignment': extract_alignment(image)
-    }
-    
-    feature_vector = [
-        features['stroke_consistency'],
-        features['letter_spacing'],
-        features['alignment'],
-        0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
-    ]
-
-    return feature_vector[:15]
+# Initialize with some sample children data if empty
+with children_store.lock:
+    children_store.refresh(children_db)
+    if not children_db:
+        sample_children = [
+            {"childId": "C001", "childName": "Alice Johnson", "age": "8", "grade": "3rd"},
+            {"childId": "C002", "childName": "Bob Smith", "age": "9", "grade": "4th"},
+            {"childId": "C003", "childName": "Charlie Brown", "age": "7", "grade": "2nd"},
+            {"childId": "C004", "childName": "Diana Prince", "age": "10", "grade": "5th"},
+            {"childId": "C005", "childName": "Ethan Hunt", "age": "8", "grade": "3rd"}
+        ]
+        children_db.extend(sample_children)
+        # child_index is built from children_db below, so there is nothing to sync yet
+        children_store.save(children_db)
+
+# Hash indexes over children_db (by childId, by teacherId, by teacher + status)
+child_index = ChildIndex(children_db)
+report_index = ReportIndex(teacher_reports)
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_BYTES)
+response_compressor = Compressor(COMPRESS_MIN_BYTES)
+
+# Under gunicorn every worker holds its own copy of the data above. Reads pick up
+# other workers' writes before each request (a stat per store when nothing changed);
+# write handlers run holding every store's lock, so they mutate current data and
+# never overwrite each other's changes.
+DATA_STORES = (parents_store, teachers_store, children_store, teacher_reports_store)
+SHARED_DATA_EXEMPT_PATHS = ('/api/predict', '/api/predict-batch', '/predict', '/api/health', '/api/health/live', '/api/health/ready',
+                            '/metrics')
+
+def reloaded(changes):
+    return any(change.get("op") == "reload" for change in changes)
+
+def sync_child_index(changes):
+    """Apply the journal records another worker wrote to child_index (rebuild it only after a full reload)"""
+    if not changes:
+        return
+    if reloaded(changes):
+        child_index.rebuild(children_db)
+        return
+    for change in changes:
+        op = change.get("op")
+        if op == "set":
+            # Replayed as a new record object in children_db
+            child_index.add(change["value"])
+            continue
+        key = change["value"].get("childId") if op == "append" else change.get("key")
+        child = child_index.get(key)
+        if child is not None:
+            child_index.reindex(child)
+        elif op == "append":
+            child_index.add(change["value"])
+
+def sync_report_index(changes, count):
+    """Index the reports another worker appended after the first count (rebuild only after a full reload)"""
+    if not changes:
+        return
+    if reloaded(changes):
+        report_index.rebuild(teacher_reports)
+        return
+    # Status updates edit the indexed records in place; only new ones need adding
+    for seq in range(count, len(teacher_reports)):
+        report_index.add(teacher_reports[seq], seq)
+
+def refresh_shared_data():
+    """Apply whatever other workers changed since this worker last looked"""
+    parents_writer.refresh()
+    teachers_writer.refresh()
+    sync_child_index(children_store.refresh(children_db))
+    count = len(teacher_reports)
+    sync_report_index(teacher_reports_store.refresh(teacher_reports), count)
+
+def exclusive_data(handler):
+    """Run a write handler holding all store locks, on freshly synced data"""
+    @wraps(handler)
+    def locked_handler(*args, **kwargs):
+        with ExitStack() as stack:
+            for store in DATA_STORES:
+                stack.enter_context(store.lock)
+            refresh_shared_data()
+            return handler(*args, **kwargs)
+    return locked_handler
+
+@app.before_request
+def start_request_metrics():
+    """Start the per-request metrics and decide whether this request's debug/info logs are kept"""
+    g.metrics_route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    g.metrics_started = time.perf_counter()
+    requests_in_flight.labels(g.metrics_route).inc()
+    log_sampler.begin(g.metrics_route)
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Latency, status and error counts per route (streamed bodies: until the first byte)"""
+    route = g.pop('metrics_route', None)
+    if route is None:
+        return
+    status = g.pop('metrics_status', 500)
+    requests_in_flight.labels(route).dec()
+    request_seconds.labels(route, request.method).observe(time.perf_counter() - g.pop('metrics_started'))
+    requests_total.labels(route, request.method, status).inc()
+    if error is not None or status >= 500:
+        request_errors.labels(route).inc()
+
+@app.before_request
+def sync_shared_data():
+    if request.path not in SHARED_DATA_EXEMPT_PATHS:
+        refresh_shared_data()
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli large JSON bodies for clients that accept it (streamed NDJSON is left alone)"""
+    if (response_compressor.min_bytes <= 0 or response.status_code != 200 or response.mimetype != 'application/json'
+            or response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    if len(body) < response_compressor.min_bytes:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = response_compressor.negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    etag, weak = response.get_etag()
+    response.set_data(response_compressor.compress(body, encoding, etag))
+    response.headers['Content-Encoding'] = encoding
+    if etag and not weak:
+        # Same content, different bytes: only a weak validator still holds
+        response.set_etag(etag, weak=True)
+    return response
 
 def normalize_features(features):
     """Normalize features using z-score normalization"""
@@ -208,122 +368,236 @@ def normalize_features(features):
         normalized = np.nan_to_num(normalized, nan=0.0, posinf=0.0, neginf=0.0)
         return normalized
     except Exception as e:
-        print(f"Error normalizing features: {e}")
+        log.warning("Error normalizing features: %s", e)
         return np.array(features).reshape(1, -1) if np.array(features).ndim == 1 else np.array(features)
 
-# Load the trained model
+# Load the trained model (in the background so non-ML routes serve immediately)
 model = None
+model_path_loaded = None
+model_version = None
 feature_scaler = None
+inference_backend = None
+predict_batcher = None
 
-try:
-    possible_paths = [
+possible_paths = [
     "dysgraphia_model.keras",
     "./dysgraphia_model.keras",
     "/opt/render/project/src/dysgraphia_model.keras",
     "/opt/render/project/src/dysgraphia_model.h5"
 ]
 
-    model_loaded = False
-    for model_path in possible_paths:
-        if os.path.exists(model_path):
-            print(f"Found model at: {model_path}")
-            try:
-                model = tf.keras.models.load_model(model_path)
-                print(f"Model loaded successfully from {model_path}")
-                
-                # Load feature scaler if available
-                import pickle
-                scaler_path = model_path.replace('.keras', '_scaler.pkl').replace('.h5', '_scaler.pkl')
-                if os.path.exists(scaler_path):
-                    with open(scaler_path, 'rb') as f:
-                        feature_scaler = pickle.load(f)
-                    print("Feature scaler loaded successfully")
-                
-                # Test model
-                dummy_image = np.random.random((1, 224, 224, 3))
-                dummy_features = np.zeros((1, 15))
-                test_pred = model.predict({"image_input": dummy_image, "feature_input": dummy_features})
-                print(f"Model test successful. Output shape: {test_pred.shape}")
-                model_loaded = True
-                break
-            except Exception as e:
-                print(f"Error loading model from {model_path}: {e}")
-                continue
-    
-    if not model_loaded:
-        print("Warning: No dysgraphia model found.")
-        print("Please train the model first.")
-        
-except Exception as e:
-    print(f"Error during model loading: {e}")
-    model = None
+# state: pending -> loading -> warming_up -> ready | unavailable | failed
+model_status = {
+    "state": "pending",
+    "step": "Waiting to start",
+    "path": None,
+    "error": None,
+    "startedAt": None,
+    "finishedAt": None,
+    "timings": {}
+}
+model_loading_done = threading.Event()
+
+def set_model_status(state=None, step=None, **fields):
+    if state is not None:
+        model_status["state"] = state
+    if step is not None:
+        model_status["step"] = step
+        log.info("Model loader: %s", step)
+    model_status.update(fields)
+
+def load_model():
+    """Load the model, select the inference backend and warm it up"""
+    global model, model_path_loaded, model_version, feature_scaler, inference_backend, predict_batcher
+
+    started = time.perf_counter()
+    set_model_status("loading", "Searching for model file", startedAt=datetime.now().isoformat())
+    try:
+        loaded = None
+        for model_path in possible_paths:
+            if os.path.exists(model_path):
+                set_model_status(step=f"Loading model from {model_path}", path=model_path)
+                try:
+                    t0 = time.perf_counter()
+                    loaded = tf.keras.models.load_model(model_path)
+                    model_status["timings"]["loadSeconds"] = round(time.perf_counter() - t0, 3)
+                    model_path_loaded = model_path
+                    model_version = file_digest(model_path)
+                    log.info("Model loaded successfully from %s (version %s)", model_path, model_version)
+                    
+                    # Load feature scaler if available
+                    import pickle
+                    scaler_path = model_path.replace('.keras', '_scaler.pkl').replace('.h5', '_scaler.pkl')
+                    if os.path.exists(scaler_path):
+                        with open(scaler_path, 'rb') as f:
+                            feature_scaler = pickle.load(f)
+                        log.info("Feature scaler loaded successfully")
+                    break
+                except Exception as e:
+                    log.warning("Error loading model from %s: %s", model_path, e)
+                    continue
+
+        if loaded is None:
+            log.warning("No dysgraphia model found. Please train the model first.")
+            set_model_status("unavailable", "No model found; serving placeholder predictions")
+            return
+
+        # Select the serving backend; fall back to plain Keras if it cannot be built
+        set_model_status("warming_up", f"Building '{INFERENCE_BACKEND}' backend and warming up")
+        dummy_inputs = {
+            "image_input": np.random.random((1, 224, 224, 3)).astype(np.float32),
+            "feature_input": np.zeros((1, 15), dtype=np.float32)
+        }
+        t0 = time.perf_counter()
+        try:
+            backend = load_backend(
+                INFERENCE_BACKEND, loaded, model_path_loaded,
+                tflite_path=TFLITE_MODEL_PATH or None,
+                num_threads=TFLITE_NUM_THREADS
+            )
+            test_pred = backend.predict(dummy_inputs)
+        except Exception as e:
+            log.warning("Error loading '%s' inference backend, falling back to keras: %s", INFERENCE_BACKEND, e)
+            backend = KerasBackend(loaded)
+            test_pred = backend.predict(dummy_inputs)
+        model_status["timings"]["warmupSeconds"] = round(time.perf_counter() - t0, 3)
+        log.info("Model test successful. Output shape: %s", np.asarray(test_pred).shape)
+        log.info("Inference backend: %s", backend.name)
+
+        # Quantized backends can give slightly different outputs, so they get their own cache entries
+        model_version = f"{model_version}-{backend.name}"
+        inference_backend = backend
+
+        # Batch concurrent requests into a single backend call
+        predict_batcher = BatchingPredictor(
+            run_backend,
+            max_batch_size=PREDICT_MAX_BATCH_SIZE,
+            max_wait_ms=PREDICT_MAX_WAIT_MS
+        )
+        model = loaded
+        set_model_status("ready", "Model ready")
 
-def preprocess_image(image_path):
-    """Preprocess image for CNN input"""
+    except Exception as e:
+        log.exception("Error during model loading: %s", e)
+        model = None
+        set_model_status("failed", "Model loading failed", error=str(e))
+    finally:
+        model_status["timings"]["totalSeconds"] = round(time.perf_counter() - started, 3)
+        model_status["finishedAt"] = datetime.now().isoformat()
+        for timing, seconds in model_status["timings"].items():
+            model_load_seconds.labels(timing[:-len('Seconds')]).set(seconds)
+        model_loading_done.set()
+
+def run_backend(inputs):
+    """One (batched) backend call, timed as the model_predict stage"""
+    with stage('model_predict'):
+        return inference_backend.predict(inputs)
+
+def model_not_ready_response():
+    """Fast 503 for ML routes while the model is still loading"""
+    response = jsonify({
+        "error": "Model is still loading, please retry shortly",
+        "model": model_status
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(MODEL_RETRY_AFTER)
+    return response
+
+if MODEL_BACKGROUND_LOAD:
+    threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+else:
+    load_model()
+
+feature_pool = FeaturePool(FEATURE_POOL, workers=FEATURE_WORKERS, working_size=FEATURE_WORKING_SIZE)
+
+# Decode/feature-extraction pool for bulk uploads (OpenCV releases the GIL)
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_PREP_WORKERS, thread_name_prefix="batch-prep")
+
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL,
+    disk_dir=PREDICTION_CACHE_DIR,
+    disk_max_entries=PREDICTION_CACHE_DISK_MAX_ENTRIES,
+    disk_max_bytes=PREDICTION_CACHE_DISK_MAX_BYTES
+)
+
+def decode_image(image_bytes):
+    """Decode uploaded image bytes within the configured size and pixel limits"""
+    if len(image_bytes) > MAX_UPLOAD_BYTES:
+        raise ImageTooLarge(f"Upload is {len(image_bytes)} bytes; the limit is {MAX_UPLOAD_BYTES}")
+    with stage('decode'):
+        return decode_image_bytes(image_bytes, pixel_budget=DECODE_PIXEL_BUDGET, max_pixels=MAX_IMAGE_PIXELS)
+
+def load_image(image):
+    """Return a BGR array for either a decoded image or an image file path"""
+    if isinstance(image, np.ndarray):
+        return image
+    img = cv2.imread(image)
+    if img is None:
+        raise ValueError(f"Could not read image from {image}")
+    return img
+
+def preprocess_image(image):
+    """Preprocess image (decoded array or file path) for CNN input"""
     try:
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"Could not read image from {image_path}")
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = cv2.resize(img, (224, 224))
-        img = img.astype(np.float32) / 255.0
-        img = np.expand_dims(img, axis=0)
-        return img
+        return image_to_tensor(load_image(image))
     except Exception as e:
-        print(f"Error preprocessing image: {e}")
+        log.warning("Error preprocessing image: %s", e)
         raise
 
-def predict_dysgraphia(image_path):
-    """Prediction function"""
-    try:
-        if model is None:
-            print("Model not available, returning dummy prediction")
-            return "Non-dysgraphic", 0.75
-
-        # Preprocess image for CNN input
-        processed_image = preprocess_image(image_path)
+def prepare_model_inputs(image):
+    """Build the CNN tensor and normalized feature row for one image"""
+    # Decode once; the same array feeds the CNN and the feature extractors
+    img = load_image(image)
 
-        # Load original image for feature extraction
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError("Could not load image for feature extraction")
-        
-        # Extract handwriting features
-        features = extract_features(img)
-        print(f"Extracted features: {features}")
-        
-        # Normalize features
+    # Preprocess for CNN input and extract handwriting features on the feature pool
+    with stage('extract_features'):
+        processed_image, features = feature_pool.run(img)
+    log.debug("Extracted features", extra={"features": features})
+    
+    # Normalize features
+    with stage('normalize'):
         if feature_scaler is not None:
             features_array = np.array(features).reshape(1, -1)
             features_normalized = feature_scaler.transform(features_array)
         else:
             features_normalized = normalize_features(np.array(features).reshape(1, -1))
-        
-        print(f"Normalized features shape: {features_normalized.shape}")
+    
+    log.debug("Normalized features", extra={"shape": features_normalized.shape})
+    return processed_image, features_normalized
 
-        # Make prediction
-        prediction = model.predict({
-            "image_input": processed_image,
-            "feature_input": features_normalized
-        }, verbose=0)
+def interpret_prediction(raw_value):
+    """Turn the model's sigmoid output into a label and confidence"""
+    raw_value = float(raw_value)
+    log.debug("Raw prediction value", extra={"raw": raw_value})
 
-        raw_value = float(prediction[0][0])
-        print(f"Raw prediction value: {raw_value}")
+    if raw_value > 0.5:
+        label = "Non-dysgraphic"
+        confidence = raw_value
+    else:
+        label = "Dysgraphic" 
+        confidence = 1.0 - raw_value
 
-        # Interpret results
-        if raw_value > 0.5:
-            label = "Non-dysgraphic"
-            confidence = raw_value
-        else:
-            label = "Dysgraphic" 
-            confidence = 1.0 - raw_value
+    log.debug("Final prediction", extra={"prediction": label, "confidence": confidence})
+    return label, confidence
+
+def predict_dysgraphia(image):
+    """Prediction function (accepts a decoded BGR array or a file path)"""
+    try:
+        if model is None:
+            log.debug("Model not available, returning dummy prediction")
+            return "Non-dysgraphic", 0.75
 
-        print(f"Final prediction: {label} with confidence: {confidence}")
-        return label, confidence
+        processed_image, features_normalized = prepare_model_inputs(image)
+
+        # Make prediction (batched with other in-flight requests)
+        prediction = predict_batcher.predict(processed_image, features_normalized)
+
+        # Interpret results
+        return interpret_prediction(prediction[0][0])
 
     except Exception as e:
-        print(f"Error in predict_dysgraphia: {e}")
-        traceback.print_exc()
+        log.exception("Error in predict_dysgraphia: %s", e)
         return "Error in prediction", 0.0
 
 def get_interpretation(label, confidence):
@@ -398,35 +672,55 @@ except:
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
     """Main API endpoint for React frontend"""
+    if not model_loading_done.is_set():
+        return model_not_ready_response()
+
     try:
-        print("=== API Prediction Request Started ===")
+        log.debug("Prediction request started")
+        receive_started = time.perf_counter()
         
         if 'image' not in request.files:
-            print("No file in request")
+            log.debug("No file in request")
             return jsonify({"error": "No file uploaded"}), 400
 
         image_file = request.files['image']
         if image_file.filename == '':
-            print("Empty filename")
+            log.debug("Empty filename")
             return jsonify({"error": "No selected file"}), 400
 
         if not allowed_file(image_file.filename):
             return jsonify({"error": "Invalid file type. Please upload an image."}), 400
 
-        # Save the uploaded file
-        filename = secure_filename(image_file.filename)
-        image_path = os.path.join(UPLOAD_FOLDER, filename)
-        image_file.save(image_path)
-        print(f"Image saved to {image_path}")
-        
-        # Make prediction
-        label, confidence = predict_dysgraphia(image_path)
-        
-        # Clean up uploaded file
-        try:
-            os.remove(image_path)
-        except:
-            pass
+        # Reject oversized uploads before hashing or decoding them
+        image_bytes = image_file.read(MAX_UPLOAD_BYTES + 1)
+        stage_seconds.labels('receive').observe(time.perf_counter() - receive_started)
+        if len(image_bytes) > MAX_UPLOAD_BYTES:
+            return jsonify({"error": f"File too large (limit {MAX_UPLOAD_BYTES} bytes)"}), 413
+
+        # Repeat uploads of the same image are served from the cache
+        cache_key = None
+        cached = None
+        if model is not None:
+            cache_key = PredictionCache.make_key(image_bytes, model_version)
+            cached = prediction_cache.get(cache_key)
+
+        if cached is not None:
+            label, confidence = cached["prediction"], cached["confidence"]
+            log.debug("Prediction served from cache")
+        else:
+            # Decode the upload in memory (no temporary file)
+            try:
+                img = decode_image(image_bytes)
+            except ImageTooLarge as e:
+                return jsonify({"error": str(e)}), 413
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            log.debug("Image decoded in memory", extra={"shape": img.shape})
+
+            # Make prediction
+            label, confidence = predict_dysgraphia(img)
+            if cache_key is not None and label != "Error in prediction":
+                prediction_cache.put(cache_key, {"prediction": label, "confidence": float(confidence)})
         
         # Return result
         result = {
@@ -435,38 +729,224 @@ def api_predict():
             "interpretation": get_interpretation(label, confidence)
         }
         
-        print(f"=== Final Result: {result} ===")
-        return jsonify(result)
+        log.debug("Prediction result", extra={"result": result})
+        with stage('serialize'):
+            return jsonify(result)
     
+    except RequestEntityTooLarge:
+        # Body over MAX_CONTENT_LENGTH: answered by the 413 handler
+        raise
     except Exception as e:
         error_msg = f"Error in prediction: {str(e)}"
-        print(error_msg)
-        traceback.print_exc()
+        log.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
+class BatchRejected(ValueError):
+    """A bulk upload over MAX_BATCH_FILES images, MAX_UPLOAD_BYTES per image or MAX_BATCH_BYTES in total"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+def collect_batch_uploads():
+    """Gather (filename, bytes) pairs from multipart files and/or zip archives.
+
+    Limits are checked before each file is read or inflated, so an oversized
+    archive (or a zip bomb) is rejected without being decompressed.
+    """
+    uploads = []
+    total = 0
+
+    def read_limited(filename, declared_size, open_file):
+        nonlocal total
+        if len(uploads) >= MAX_BATCH_FILES:
+            raise BatchRejected(f"Too many files (max {MAX_BATCH_FILES})", 400)
+        if declared_size is not None and declared_size > MAX_UPLOAD_BYTES:
+            raise BatchRejected(f"{filename} is larger than {MAX_UPLOAD_BYTES} bytes", 413)
+        with open_file() as f:
+            data = f.read(MAX_UPLOAD_BYTES + 1)
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise BatchRejected(f"{filename} is larger than {MAX_UPLOAD_BYTES} bytes", 413)
+        total += len(data)
+        if total > MAX_BATCH_BYTES:
+            raise BatchRejected(f"Batch is larger than {MAX_BATCH_BYTES} bytes", 413)
+        uploads.append((filename, data))
+
+    for field in ('images', 'image', 'archive'):
+        for upload in request.files.getlist(field):
+            if not upload.filename:
+                continue
+            if upload.filename.lower().endswith('.zip'):
+                data = upload.read(MAX_BATCH_BYTES + 1)
+                if len(data) > MAX_BATCH_BYTES:
+                    raise BatchRejected(f"Batch is larger than {MAX_BATCH_BYTES} bytes", 413)
+                with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                    for info in archive.infolist():
+                        if not info.is_dir() and allowed_file(info.filename):
+                            read_limited(info.filename, info.file_size, lambda: archive.open(info))
+            elif allowed_file(upload.filename):
+                read_limited(upload.filename, None, lambda: nullcontext(upload))
+    return uploads
+
+def prepare_batch_item(image_bytes):
+    """Worker-pool stage of /api/predict-batch: cache lookup, decode and feature extraction"""
+    cache_key = PredictionCache.make_key(image_bytes, model_version)
+    cached = prediction_cache.get(cache_key)
+    if cached is not None:
+        return cache_key, (cached["prediction"], cached["confidence"]), None
+    img = decode_image(image_bytes)
+    return cache_key, None, prepare_model_inputs(img)
+
+def batch_result_line(index, filename, label=None, confidence=None, error=None):
+    if error is not None:
+        result = {"index": index, "filename": filename, "error": error}
+    else:
+        result = {
+            "index": index,
+            "filename": filename,
+            "prediction": label,
+            "confidence": round(float(confidence), 4),
+            "interpretation": get_interpretation(label, confidence)
+        }
+    with stage('serialize'):
+        return json.dumps(result) + "\n"
+
+@app.route('/api/predict-batch', methods=['POST'])
+def api_predict_batch():
+    """Predict many worksheets in one request, streaming one JSON line per image"""
+    if not model_loading_done.is_set():
+        return model_not_ready_response()
+
+    request.max_content_length = MAX_BATCH_BYTES + MULTIPART_OVERHEAD
+    try:
+        with stage('receive'):
+            uploads = collect_batch_uploads()
+    except zipfile.BadZipFile:
+        return jsonify({"error": "Invalid zip archive"}), 400
+    except BatchRejected as e:
+        return jsonify({"error": str(e)}), e.status
+
+    if not uploads:
+        return jsonify({"error": "No image files uploaded"}), 400
+
+    log.debug("Batch prediction request", extra={"images": len(uploads)})
+
+    def generate():
+        if model is None:
+            for index, (filename, data) in enumerate(uploads):
+                try:
+                    label, confidence = predict_dysgraphia(decode_image(data))
+                except ValueError as e:
+                    yield batch_result_line(index, filename, error=str(e))
+                    continue
+                yield batch_result_line(index, filename, label, confidence)
+            return
+
+        # Decode and extract features in parallel
+        prepared = {
+            batch_executor.submit(prepare_batch_item, data): (index, filename)
+            for index, (filename, data) in enumerate(uploads)
+        }
+        inflight = {}
+        ready = []
+        waiting = set(prepared)
+
+        while waiting:
+            done, waiting = wait(waiting, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in prepared:
+                    index, filename = prepared.pop(future)
+                    try:
+                        cache_key, cached, inputs = future.result()
+                    except ValueError as e:
+                        yield batch_result_line(index, filename, error=str(e))
+                        continue
+                    except Exception as e:
+                        yield batch_result_line(index, filename, error=f"Error in prediction: {str(e)}")
+                        continue
+                    if cached is not None:
+                        yield batch_result_line(index, filename, *cached)
+                    else:
+                        ready.append((index, filename, cache_key, inputs))
+                else:
+                    items = inflight.pop(future)
+                    try:
+                        outputs = future.result()
+                    except Exception as e:
+                        for index, filename, _ in items:
+                            yield batch_result_line(index, filename, error=f"Error in prediction: {str(e)}")
+                        continue
+                    for (index, filename, cache_key), row in zip(items, outputs):
+                        label, confidence = interpret_prediction(row[0])
+                        prediction_cache.put(cache_key, {"prediction": label, "confidence": float(confidence)})
+                        yield batch_result_line(index, filename, label, confidence)
+
+            # Send full batches as soon as they fill, and the remainder once extraction is done
+            while len(ready) >= PREDICT_MAX_BATCH_SIZE or (ready and not prepared):
+                chunk, ready = ready[:PREDICT_MAX_BATCH_SIZE], ready[PREDICT_MAX_BATCH_SIZE:]
+                images = np.concatenate([inputs[0] for _, _, _, inputs in chunk], axis=0)
+                features = np.concatenate([inputs[1] for _, _, _, inputs in chunk], axis=0)
+                future = predict_batcher.submit(images, features)
+                inflight[future] = [(index, filename, cache_key) for index, filename, cache_key, _ in chunk]
+                waiting.add(future)
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 # Legacy endpoint
 @app.route('/predict', methods=['POST'])
 def predict():
     """Legacy prediction endpoint"""
     return api_predict()
 
-# Health check endpoint
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics for this worker process"""
+    return Response(metrics_registry.render(), content_type=Registry.CONTENT_TYPE)
+
+# Health check endpoints
+@app.route('/api/health/live', methods=['GET'])
+def api_liveness():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({"status": "alive"})
+
+@app.route('/api/health/ready', methods=['GET'])
+def api_readiness():
+    """Readiness: model loading has finished (503 with progress until then)"""
+    ready = model_loading_done.is_set()
+    response = jsonify({
+        "status": "ready" if ready else "loading",
+        "model_loaded": model is not None,
+        "model": model_status
+    })
+    if not ready:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(MODEL_RETRY_AFTER)
+    return response
+
 @app.route('/api/health', methods=['GET'])
 def api_health_check():
     """API health check endpoint"""
     return jsonify({
         "status": "healthy",
+        "ready": model_loading_done.is_set(),
         "model_loaded": model is not None,
+        "model": model_status,
+        "model_version": model_version,
+        "inference_backend": inference_backend.name if inference_backend else None,
+        "prediction_cache": prediction_cache.stats(),
+        "response_cache": response_cache.stats(),
         "message": "MindTrack API is running"
     })
 
 # Parent Authentication Routes
 @app.route('/api/parent-register', methods=['POST'])
+@exclusive_data
 def parent_register():
     """Register a new parent with password authentication"""
     try:
         data = request.get_json()
-        print(f"Registration request: {data}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Parent registration request", extra={"body": redact(data)})
         
         # Get all the data from frontend
         parentId = data.get('parentId')
@@ -513,9 +993,9 @@ def parent_register():
         }
         
         # Save to file
-        save_parents_data(parents)
+        save_parents_data(parents, set_record(parentId, parents[parentId]))
         
-        print(f"Parent {parentId} registered successfully")
+        log.info("Parent %s registered successfully", parentId)
         return jsonify({
             "success": True, 
             "message": "Parent registered successfully",
@@ -523,7 +1003,7 @@ def parent_register():
         }), 200
         
     except Exception as e:
-        print(f"Registration error: {e}")
+        log.exception("Registration error: %s", e)
         return jsonify({"success": False, "message": f"Registration error: {str(e)}"}), 500
 
 @app.route('/api/parent-login', methods=['POST'])
@@ -534,7 +1014,7 @@ def parent_login():
         parentId = data.get('parentId')
         password = data.get('password')
         
-        print(f"Login attempt for parentId: {parentId}")
+        log.debug("Login attempt for parentId: %s", parentId)
         
         # Validation
         if not parentId or not password:
@@ -552,11 +1032,11 @@ def parent_login():
         
         # Update last activity
         parents[parentId]['lastActivity'] = datetime.now().isoformat()
-        save_parents_data(parents)
+        defer_parents_data(update_record(parentId, {"lastActivity": parents[parentId]['lastActivity']}))
         
         child = parent['child']
         
-        print(f"Login successful for parentId: {parentId}")
+        log.debug("Login successful for parentId: %s", parentId)
         return jsonify({
             "success": True,
             "childId": child['id'],
@@ -572,7 +1052,7 @@ def parent_login():
         }), 200
         
     except Exception as e:
-        print(f"Login error: {e}")
+        log.exception("Login error: %s", e)
         return jsonify({"success": False, "message": f"Login error: {str(e)}"}), 500
 
 @app.route('/api/parent-update-assessment', methods=['POST'])
@@ -588,7 +1068,10 @@ def update_assessment():
         
         parents[parentId]['dysgraphiaResult'] = assessment_result
         parents[parentId]['lastActivity'] = datetime.now().isoformat()
-        save_parents_data(parents)
+        defer_parents_data(update_record(parentId, {
+            "dysgraphiaResult": assessment_result,
+            "lastActivity": parents[parentId]['lastActivity']
+        }))
         
         return jsonify({"success": True, "message": "Assessment updated successfully"}), 200
         
@@ -597,11 +1080,13 @@ def update_assessment():
 
 # Teacher Routes
 @app.route('/api/teacher-register', methods=['POST'])
+@exclusive_data
 def teacher_register():
     """Register a new teacher"""
     try:
         data = request.get_json()
-        print(f"Teacher registration request: {data}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Teacher registration request", extra={"body": redact(data)})
         
         teacherId = data.get('teacherId')
         teacherName = data.get('teacherName')
@@ -632,9 +1117,9 @@ def teacher_register():
             "lastActivity": datetime.now().isoformat()
         }
         
-        save_teachers_data(teachers)
+        save_teachers_data(teachers, set_record(teacherId, teachers[teacherId]))
         
-        print(f"Teacher {teacherId} registered successfully")
+        log.info("Teacher %s registered successfully", teacherId)
         return jsonify({
             "success": True, 
             "message": "Teacher registered successfully",
@@ -642,7 +1127,7 @@ def teacher_register():
         }), 200
         
     except Exception as e:
-        print(f"Teacher registration error: {e}")
+        log.exception("Teacher registration error: %s", e)
         return jsonify({"success": False, "message": f"Registration error: {str(e)}"}), 500
 
 @app.route('/api/teacher-login', methods=['POST'])
@@ -653,7 +1138,7 @@ def teacher_login():
         teacherId = data.get('teacherId')
         password = data.get('password')
         
-        print(f"Teacher login attempt for: {teacherId}")
+        log.debug("Teacher login attempt for: %s", teacherId)
         
         if not teacherId or not password:
             return jsonify({"success": False, "message": "Teacher ID and password are required"}), 400
@@ -670,9 +1155,9 @@ def teacher_login():
         
         # Update last activity
         teachers[teacherId]['lastActivity'] = datetime.now().isoformat()
-        save_teachers_data(teachers)
+        defer_teachers_data(update_record(teacherId, {"lastActivity": teachers[teacherId]['lastActivity']}))
         
-        print(f"Teacher login successful for: {teacherId}")
+        log.debug("Teacher login successful for: %s", teacherId)
         return jsonify({
             "success": True,
             "teacherId": teacher['teacherId'],
@@ -684,30 +1169,103 @@ def teacher_login():
         }), 200
         
     except Exception as e:
-        print(f"Teacher login error: {e}")
+        log.exception("Teacher login error: %s", e)
         return jsonify({"success": False, "message": f"Login error: {str(e)}"}), 500
 
+def is_position_cursor(cursor):
+    return isinstance(cursor, int) and not isinstance(cursor, bool) and cursor >= 0
+
+def is_test_report_cursor(cursor):
+    """[testDate, child seq, testId] from a child-test-reports page"""
+    return (isinstance(cursor, list) and len(cursor) == 3 and isinstance(cursor[0], str)
+            and is_position_cursor(cursor[1]) and isinstance(cursor[2], str))
+
+def limit_param():
+    """?limit= from the query string, or None if absent"""
+    limit = request.args.get('limit')
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+def page_params(valid_cursor=is_position_cursor):
+    """limit and decoded after cursor from the query string; limit None means no paging"""
+    limit = limit_param()
+    after = request.args.get('after')
+    if limit is None:
+        if after is not None:
+            raise ValueError("after requires limit")
+        return None, None
+    if not after:
+        return limit, None
+    cursor = decode_cursor(after)
+    if not valid_cursor(cursor):
+        raise ValueError("Invalid cursor")
+    return limit, cursor
+
+def bad_page_params(e):
+    return jsonify({"success": False, "message": str(e)}), 400
+
+def versioned_json(version, build):
+    """200 JSON response with an ETag, or 304 if the client's If-None-Match still matches.
+
+    The body for this URL is serialized once per data version (build() is only
+    called on a miss), so unchanged data is never re-encoded for repeat polls.
+    """
+    cached = response_cache.get(request.full_path, version)
+    if cached is None:
+        cached = response_cache.put(request.full_path, version, jsonify(build()).get_data())
+    etag, body = cached
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate it on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/api/children', methods=['GET'])
 def get_children():
-    """Get list of all children"""
+    """Get list of all children (paged with ?limit=&after=)"""
     try:
-        return jsonify({
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return bad_page_params(e)
+        if limit is None:
+            return versioned_json(child_index.version('children'), lambda: {
+                "success": True,
+                "children": children_db
+            })
+        # children_db only ever grows, so a list position is a stable cursor
+        start = after + 1 if after is not None else 0
+        more = start + limit < len(children_db)
+        return versioned_json(child_index.version('children'), lambda: {
             "success": True,
-            "children": children_db
-        }), 200
+            "children": children_db[start:start + limit],
+            "nextCursor": encode_cursor(start + limit - 1) if more else None
+        })
     except Exception as e:
         return jsonify({"success": False, "message": f"Error fetching children: {str(e)}"}), 500
 
 @app.route('/api/report-problem', methods=['POST'])
+@exclusive_data
 def report_problem():
     """Submit a problem report for a student"""
     try:
         data = request.get_json()
-        print(f"Problem report submission: {data}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Problem report submission", extra={"body": redact(data)})
         
         # Create report entry
         report = {
-            "reportId": f"RPT{int(datetime.now().timestamp())}",
+            "reportId": unique_id("RPT"),
             "teacherId": data.get('teacherId'),
             "teacherName": data.get('teacherName'),
             "childId": data.get('childId'),
@@ -720,9 +1278,10 @@ def report_problem():
         }
         
         teacher_reports.append(report)
-        save_teacher_reports_data(teacher_reports)
+        report_index.add(report, len(teacher_reports) - 1)
+        save_teacher_reports_data(teacher_reports, append_record(report))
         
-        print(f"Problem report submitted successfully: {report['reportId']}")
+        log.info("Problem report submitted successfully: %s", report['reportId'])
         return jsonify({
             "success": True,
             "message": "Problem report submitted successfully",
@@ -730,21 +1289,28 @@ def report_problem():
         }), 200
         
     except Exception as e:
-        print(f"Problem report error: {e}")
+        log.exception("Problem report error: %s", e)
         return jsonify({"success": False, "message": f"Error submitting report: {str(e)}"}), 500
 
 @app.route('/api/teacher-reports/<teacherId>', methods=['GET'])
 def get_teacher_reports(teacherId):
-    """Get all reports submitted by a specific teacher"""
+    """Get all reports submitted by a specific teacher (paged with ?limit=&after=)"""
     try:
-        teacher_specific_reports = [
-            report for report in teacher_reports 
-            if report.get('teacherId') == teacherId
-        ]
-        
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return bad_page_params(e)
+        if limit is None:
+            return jsonify({
+                "success": True,
+                "reports": report_index.for_teacher(teacherId)
+            }), 200
+        
+        page, last = report_index.page_for_teacher(teacherId, after, limit)
         return jsonify({
             "success": True,
-            "reports": teacher_specific_reports
+            "reports": page,
+            "nextCursor": encode_cursor(last) if last is not None else None
         }), 200
         
     except Exception as e:
@@ -758,7 +1324,10 @@ def index():
         "message": "MindTrack API is running",
         "endpoints": {
             "prediction": "/api/predict (POST)",
+            "batch_prediction": "/api/predict-batch (POST, multipart files or zip; NDJSON response)",
             "health": "/api/health (GET)",
+            "liveness": "/api/health/live (GET)",
+            "readiness": "/api/health/ready (GET)",
             "parent_register": "/api/parent-register (POST)",
             "parent_login": "/api/parent-login (POST)",
             "update_assessment": "/api/parent-update-assessment (POST)",
@@ -779,11 +1348,13 @@ def index():
 # Add these endpoints to your existing Flask app
 
 @app.route('/api/register-child', methods=['POST'])
+@exclusive_data
 def register_child():
     """Register a new child dynamically from teacher interface"""
     try:
         data = request.get_json()
-        print(f"Child registration request: {data}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Child registration request", extra={"body": redact(data)})
         
         # Extract child data
         childId = data.get('childId')
@@ -806,8 +1377,7 @@ def register_child():
             return jsonify({"success": False, "message": "Teacher ID is required"}), 400
 
         # Check if child ID already exists
-        existing_child = next((child for child in children_db if child['childId'] == childId), None)
-        if existing_child:
+        if childId in child_index:
             return jsonify({"success": False, "message": "Child ID already exists"}), 400
 
         # Create new child record
@@ -829,9 +1399,10 @@ def register_child():
         
         # Add to children database
         children_db.append(new_child)
-        save_children_data(children_db)
+        child_index.add(new_child)
+        save_children_data(children_db, set_record(childId, new_child))
         
-        print(f"Child {childId} registered successfully by teacher {teacherId}")
+        log.info("Child %s registered successfully by teacher %s", childId, teacherId)
         return jsonify({
             "success": True,
             "message": "Child registered successfully",
@@ -839,15 +1410,17 @@ def register_child():
         }), 200
         
     except Exception as e:
-        print(f"Child registration error: {e}")
+        log.exception("Child registration error: %s", e)
         return jsonify({"success": False, "message": f"Registration error: {str(e)}"}), 500
 
 @app.route('/api/save-test-result', methods=['POST'])
+@exclusive_data
 def save_test_result():
     """Save test result for a specific child"""
     try:
         data = request.get_json()
-        print(f"Saving test result: {data}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Saving test result", extra={"body": redact(data)})
         
         childId = data.get('childId')
         prediction = data.get('prediction')
@@ -859,14 +1432,14 @@ def save_test_result():
             return jsonify({"success": False, "message": "Child ID and prediction are required"}), 400
 
         # Find the child in the database
-        child_index = next((i for i, child in enumerate(children_db) if child['childId'] == childId), None)
+        child = child_index.get(childId)
         
-        if child_index is None:
+        if child is None:
             return jsonify({"success": False, "message": "Child not found"}), 404
 
         # Create test result record
         test_result = {
-            "testId": f"TEST{int(datetime.now().timestamp())}",
+            "testId": unique_id("TEST"),
             "prediction": prediction,
             "confidence": confidence,
             "interpretation": data.get('interpretation', ''),
@@ -877,17 +1450,21 @@ def save_test_result():
         }
         
         # Add test result to child's record
-        if 'testResults' not in children_db[child_index]:
-            children_db[child_index]['testResults'] = []
+        if 'testResults' not in child:
+            child['testResults'] = []
         
-        children_db[child_index]['testResults'].append(test_result)
-        children_db[child_index]['lastTestDate'] = testDate
-        children_db[child_index]['lastTestResult'] = prediction
+        child['testResults'].append(test_result)
+        child['lastTestDate'] = testDate
+        child['lastTestResult'] = prediction
+        child_index.reindex(child)
         
-        # Save updated children data
-        save_children_data(children_db)
+        # Save updated children data (journals just the new test, not the whole history)
+        save_children_data(children_db, push_record(childId, 'testResults', test_result, {
+            "lastTestDate": testDate,
+            "lastTestResult": prediction
+        }, item_key='testId'))
         
-        print(f"Test result saved for child {childId}")
+        log.debug("Test result saved for child %s", childId)
         return jsonify({
             "success": True,
             "message": "Test result saved successfully",
@@ -895,90 +1472,117 @@ def save_test_result():
         }), 200
         
     except Exception as e:
-        print(f"Save test result error: {e}")
+        log.exception("Save test result error: %s", e)
         return jsonify({"success": False, "message": f"Error saving test result: {str(e)}"}), 500
 
 @app.route('/api/children-by-teacher/<teacherId>', methods=['GET'])
 def get_children_by_teacher(teacherId):
-    """Get all children registered by a specific teacher"""
+    """Get all children registered by a specific teacher (paged with ?limit=&after=)"""
     try:
-        teacher_children = [
-            child for child in children_db 
-            if child.get('teacherId') == teacherId
-        ]
+        try:
+            limit, after = page_params()
+        except ValueError as e:
+            return bad_page_params(e)
+        def build():
+            if limit is None:
+                teacher_children = child_index.for_teacher(teacherId)
+                return {
+                    "success": True,
+                    "children": teacher_children,
+                    "count": len(teacher_children)
+                }
+            teacher_children, last = child_index.page_for_teacher(teacherId, after, limit)
+            return {
+                "success": True,
+                "children": teacher_children,
+                "count": len(teacher_children),
+                "nextCursor": encode_cursor(last) if last is not None else None
+            }
         
-        return jsonify({
-            "success": True,
-            "children": teacher_children,
-            "count": len(teacher_children)
-        }), 200
+        return versioned_json(child_index.version('teacher', teacherId), build)
         
     except Exception as e:
         return jsonify({"success": False, "message": f"Error fetching children: {str(e)}"}), 500
 
 @app.route('/api/child-details/<childId>', methods=['GET'])
 def get_child_details(childId):
-    """Get detailed information about a specific child including test history"""
+    """Get detailed information about a specific child including test history (?tests=N keeps the last N)"""
     try:
-        child = next((child for child in children_db if child['childId'] == childId), None)
+        child = child_index.get(childId)
         
         if not child:
             return jsonify({"success": False, "message": "Child not found"}), 404
         
-        return jsonify({
-            "success": True,
-            "child": child
-        }), 200
+        tests = request.args.get('tests')
+        if tests is not None and not tests.isdigit():
+            return jsonify({"success": False, "message": "tests must be a non-negative integer"}), 400
+        
+        def build():
+            details = child
+            if tests is not None:
+                details = dict(child)
+                details['testResults'] = (child.get('testResults') or TestHistory()).select(last=int(tests))
+            return {
+                "success": True,
+                "child": details
+            }
+        
+        return versioned_json(child_index.version('child', childId), build)
         
     except Exception as e:
         return jsonify({"success": False, "message": f"Error fetching child details: {str(e)}"}), 500
 
 @app.route('/api/update-child/<childId>', methods=['PUT'])
+@exclusive_data
 def update_child(childId):
     """Update child information"""
     try:
         data = request.get_json()
         
-        child_index = next((i for i, child in enumerate(children_db) if child['childId'] == childId), None)
+        child = child_index.get(childId)
         
-        if child_index is None:
+        if child is None:
             return jsonify({"success": False, "message": "Child not found"}), 404
         
         # Update allowed fields
         updatable_fields = ['childName', 'age', 'grade', 'school', 'parentName', 'parentEmail', 'parentPhone']
         
-        for field in updatable_fields:
-            if field in data:
-                children_db[child_index][field] = data[field]
-        
-        children_db[child_index]['lastUpdated'] = datetime.now().isoformat()
+        changed = {field: data[field] for field in updatable_fields if field in data}
+        changed['lastUpdated'] = datetime.now().isoformat()
+        child.update(changed)
+        child_index.reindex(child)
         
         # Save updated data
-        save_children_data(children_db)
+        save_children_data(children_db, update_record(childId, changed))
         
         return jsonify({
             "success": True,
             "message": "Child information updated successfully",
-            "child": children_db[child_index]
+            "child": child
         }), 200
         
     except Exception as e:
         return jsonify({"success": False, "message": f"Error updating child: {str(e)}"}), 500
 
 @app.route('/api/delete-child/<childId>', methods=['DELETE'])
+@exclusive_data
 def delete_child(childId):
     """Delete a child record (soft delete - mark as inactive)"""
     try:
-        child_index = next((i for i, child in enumerate(children_db) if child['childId'] == childId), None)
+        child = child_index.get(childId)
         
-        if child_index is None:
+        if child is None:
             return jsonify({"success": False, "message": "Child not found"}), 404
         
         # Soft delete - mark as inactive instead of removing
-        children_db[child_index]['status'] = 'Inactive'
-        children_db[child_index]['deletedDate'] = datetime.now().isoformat()
+        child['status'] = 'Inactive'
+        child['deletedDate'] = datetime.now().isoformat()
+        child_index.reindex(child)
         
-        save_children_data(children_db)
+        save_children_data(children_db, update_record(childId, {
+            "status": 'Inactive',
+            "deletedDate": child['deletedDate']
+        }))
         
         return jsonify({
             "success": True,
@@ -990,21 +1594,32 @@ def delete_child(childId):
 
 @app.route('/api/child-test-history/<childId>', methods=['GET'])
 def get_child_test_history(childId):
-    """Get test history for a specific child"""
+    """Get test history for a specific child, oldest first.
+
+    Optional range filters: ?from=<date>&to=<date> (inclusive, ISO dates or
+    datetimes) and ?last=N for the N most recent tests in that range.
+    """
     try:
-        child = next((child for child in children_db if child['childId'] == childId), None)
+        child = child_index.get(childId)
         
         if not child:
             return jsonify({"success": False, "message": "Child not found"}), 404
         
-        test_results = child.get('testResults', [])
+        history = child.get('testResults') or TestHistory()
+        last = request.args.get('last')
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        if last is not None and not last.isdigit():
+            return jsonify({"success": False, "message": "last must be a non-negative integer"}), 400
+        
+        test_results = history.select(date_from, date_to, int(last) if last is not None else None)
         
         return jsonify({
             "success": True,
             "childId": childId,
             "childName": child['childName'],
             "testResults": test_results,
-            "totalTests": len(test_results)
+            "totalTests": len(history)
         }), 200
         
     except Exception as e:
@@ -1012,7 +1627,7 @@ def get_child_test_history(childId):
 
 @app.route('/api/search-children', methods=['GET'])
 def search_children():
-    """Search children by name, ID, or other criteria"""
+    """Search children by name, ID, or school (substring match, best matches first, optional ?limit=)"""
     try:
         query = request.args.get('q', '').lower()
         teacher_id = request.args.get('teacherId', '')
@@ -1020,22 +1635,14 @@ def search_children():
         if not query:
             return jsonify({"success": False, "message": "Search query is required"}), 400
         
-        # Filter children based on search criteria
-        filtered_children = []
+        # Results are ranked, not paged: only ?limit= applies (a stray ?after= is ignored)
+        try:
+            limit = limit_param()
+        except ValueError as e:
+            return bad_page_params(e)
         
-        for child in children_db:
-            if child.get('status', 'Active') == 'Inactive':
-                continue
-                
-            # If teacher_id is provided, only search within that teacher's children
-            if teacher_id and child.get('teacherId') != teacher_id:
-                continue
-            
-            # Search in multiple fields
-            searchable_text = f"{child.get('childName', '').lower()} {child.get('childId', '').lower()} {child.get('school', '').lower()}"
-            
-            if query in searchable_text:
-                filtered_children.append(child)
+        # n-gram index lookup; if teacher_id is provided, only that teacher's children are searched
+        filtered_children = child_index.search(query, teacher_id or None, limit)
         
         return jsonify({
             "success": True,
@@ -1051,71 +1658,32 @@ def search_children():
 def get_dashboard_stats(teacherId):
     """Get dashboard statistics for a specific teacher"""
     try:
-        teacher_children = [
-            child for child in children_db 
-            if child.get('teacherId') == teacherId and child.get('status', 'Active') == 'Active'
-        ]
-        
-        # Calculate statistics
-        total_children = len(teacher_children)
-        children_with_tests = len([child for child in teacher_children if child.get('testResults')])
-        
-        # Count test results by prediction
-        dysgraphic_count = 0
-        non_dysgraphic_count = 0
-        
-        for child in teacher_children:
-            if child.get('lastTestResult'):
-                if child['lastTestResult'] == 'Dysgraphic':
-                    dysgraphic_count += 1
-                else:
-                    non_dysgraphic_count += 1
-        
-        # Recent activity (children registered in last 7 days)
-        recent_registrations = 0
-        current_time = datetime.now()
-        
-        for child in teacher_children:
-            if child.get('registrationDate'):
-                try:
-                    reg_date = datetime.fromisoformat(child['registrationDate'].replace('Z', '+00:00'))
-                    days_diff = (current_time - reg_date).days
-                    if days_diff <= 7:
-                        recent_registrations += 1
-                except:
-                    pass
-        
-        return jsonify({
+        # Counters are kept up to date on the write paths, so this does not depend on class size
+        stats = child_index.dashboard_stats(teacherId)
+        # recentRegistrations also changes as registrations age out, without any write
+        version = (child_index.version('teacher', teacherId), stats["recentRegistrations"])
+        return versioned_json(version, lambda: {
             "success": True,
-            "stats": {
-                "totalChildren": total_children,
-                "childrenWithTests": children_with_tests,
-                "childrenWithoutTests": total_children - children_with_tests,
-                "dysgraphicResults": dysgraphic_count,
-                "nonDysgraphicResults": non_dysgraphic_count,
-                "recentRegistrations": recent_registrations
-            }
-        }), 200
+            "stats": stats
+        })
         
     except Exception as e:
         return jsonify({"success": False, "message": f"Error fetching dashboard stats: {str(e)}"}), 500
 @app.route('/api/child-test-reports/<teacherId>', methods=['GET'])
 def get_child_test_reports(teacherId):
-    """Get test reports for all children associated with a specific teacher"""
+    """Get test reports for all children associated with a specific teacher, newest first (paged with ?limit=&after=)"""
     try:
-        # Get all children for this teacher
-        teacher_children = [
-            child for child in children_db 
-            if child.get('teacherId') == teacherId and child.get('status', 'Active') == 'Active'
-        ]
+        try:
+            limit, after = page_params(is_test_report_cursor)
+        except ValueError as e:
+            return bad_page_params(e)
         
-        # Extract all test results from all children
-        reports = []
+        def build():
+            # Merge the children's already-ordered tests instead of flattening and sorting them all
+            pairs, last = child_index.test_reports(teacherId, after, limit)
+            reports = []
         
-        for child in teacher_children:
-            test_results = child.get('testResults', [])
-            
-            for test in test_results:
+            for child, test in pairs:
                 report = {
                     "childId": child['childId'],
                     "childName": child['childName'],
@@ -1131,18 +1699,21 @@ def get_child_test_reports(teacherId):
                 }
                 reports.append(report)
         
-        # Sort by test date (most recent first)
-        reports.sort(key=lambda x: x.get('testDate', ''), reverse=True)
+            response = {
+                "success": True,
+                "reports": reports,
+                "totalReports": len(reports) if limit is None else sum(
+                    len(child.get('testResults') or []) for child in child_index.for_teacher(teacherId, 'Active')),
+                "teacherId": teacherId
+            }
+            if limit is not None:
+                response["nextCursor"] = encode_cursor(last) if last is not None else None
+            return response
         
-        return jsonify({
-            "success": True,
-            "reports": reports,
-            "totalReports": len(reports),
-            "teacherId": teacherId
-        }), 200
+        return versioned_json(child_index.version('teacher', teacherId), build)
         
     except Exception as e:
-        print(f"Error fetching child test reports: {e}")
+        log.exception("Error fetching child test reports: %s", e)
         return jsonify({
             "success": False, 
             "message": f"Error fetching test reports: {str(e)}"
@@ -1177,19 +1748,26 @@ def memory_maze():
 def not_found_error(error):
     return jsonify({"error": "Resource not found"}), 404
 
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({"error": f"Request body too large (limit {request.max_content_length} bytes)"}), 413
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
 if __name__ == '__main__':
     print("Starting MindTrack Flask API...")
-    print(f"Model status: {'Loaded' if model else 'Not loaded'}")
+    print(f"Model status: {model_status['state']} (loading in background)" if MODEL_BACKGROUND_LOAD else f"Model status: {model_status['state']}")
     print(f"Registered parents: {len(parents)}")
     print(f"Registered teachers: {len(teachers)}")
     print(f"Total children: {len(children_db)}")
     print(f"Total reports: {len(teacher_reports)}")
+    if FEATURE_POOL == 'process':
+        print("FEATURE_POOL=process: every feature worker re-imports this script; serve with gunicorn instead")
     print("Available endpoints:")
     print("  POST /api/predict - Main prediction endpoint")
+    print("  POST /api/predict-batch - Bulk prediction (streams NDJSON)")
     print("  POST /api/parent-register - Parent registration")
     print("  POST /api/parent-login - Parent login")
     print("  POST /api/parent-update-assessment - Update assessment results")
@@ -1199,9 +1777,12 @@ if __name__ == '__main__':
     print("  POST /api/report-problem - Submit problem reports")
     print("  GET /api/teacher-reports/<teacherId> - Get teacher reports")
     print("  GET /api/health - Health check")
+    print("  GET /api/health/live - Liveness check")
+    print("  GET /api/health/ready - Readiness check (model loading progress)")
     print("\nData storage:")
     print("  Parents: data/parents.json")
     print("  Teachers: data/teachers.json") 
     print("  Children: data/children.json")
     print("  Reports: data/teacher_reports.json")
+    print(f"  Backend: {STORAGE_BACKEND}")
     app.run(debug=True, host='0.0.0.0', port=5000)
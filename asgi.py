@@ -0,0 +1,164 @@
+"""Asyncio (ASGI) serving mode for MindTrack.
+
+Run with:  uvicorn asgi:app --host 0.0.0.0 --port 5000
+      or:  gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+Request bodies are received on the event loop, so a slow mobile upload only
+costs a coroutine, not a worker. Once the body is in memory the request is
+dispatched to the existing Flask app on an executor, so every route and JSON
+contract is exactly the one served by app_fixed. Prediction routes get their
+own executor so CPU/TensorFlow work never starves login and child CRUD calls.
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_fixed import app as flask_app, stage_seconds
+
+MAX_REQUEST_BYTES = int(os.environ.get('ASGI_MAX_REQUEST_BYTES', 64 * 1024 * 1024))
+ML_WORKERS = int(os.environ.get('ASGI_ML_WORKERS', os.cpu_count() or 1))
+IO_WORKERS = int(os.environ.get('ASGI_IO_WORKERS', 32))
+
+ML_PATHS = ('/api/predict', '/api/predict-batch', '/predict')
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope plus buffered body into a WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    raw_path = scope.get('raw_path')
+    path = raw_path.split(b'?', 1)[0] if raw_path else scope['path'].encode('utf-8')
+    root_path = scope.get('root_path', '').encode('utf-8')
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.decode('latin-1'),
+        'PATH_INFO': path.decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            continue
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class MindTrackASGI:
+    """ASGI front end that buffers uploads asynchronously and runs Flask on executors"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.ml_executor = ThreadPoolExecutor(max_workers=ML_WORKERS, thread_name_prefix="asgi-ml")
+        self.io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="asgi-io")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.ml_executor.shutdown(wait=False, cancel_futures=True)
+                self.io_executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        """Receive the request body without blocking; None if the client went away"""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_REQUEST_BYTES:
+                raise ValueError("Request body too large")
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def _send_json_error(self, send, status, message):
+        body = json.dumps({"error": message}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _http(self, scope, receive, send):
+        receive_started = time.perf_counter()
+        try:
+            body = await self._read_body(receive)
+        except ValueError as e:
+            await self._send_json_error(send, 413, str(e))
+            return
+        if body is None:
+            return
+
+        is_ml = scope['path'] in ML_PATHS
+        if is_ml:
+            # Time the client took to upload; Flask's own 'receive' stage then only parses the buffered body
+            stage_seconds.labels('receive_body').observe(time.perf_counter() - receive_started)
+        executor = self.ml_executor if is_ml else self.io_executor
+        loop = asyncio.get_running_loop()
+        environ = build_environ(scope, body)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+            return lambda data: None
+
+        result = await loop.run_in_executor(executor, self.wsgi_app, environ, start_response)
+        iterator = iter(result)
+        done = object()
+        response_started = False
+        try:
+            # Pull chunks on the executor so streamed responses (NDJSON) flow as they are produced
+            while True:
+                chunk = await loop.run_in_executor(executor, next, iterator, done)
+                if not response_started:
+                    await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+                    response_started = True
+                if chunk is done:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(executor, close)
+
+
+app = MindTrackASGI(flask_app)
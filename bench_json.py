@@ -0,0 +1,156 @@
+"""Serialization benchmark: encode time and bytes on the wire for a large teacher report.
+
+Run with:  python bench_json.py --children 5000 --tests 4
+
+Builds a synthetic class, encodes the /api/child-test-reports and
+/api/children-by-teacher payloads the way Flask's default jsonify does
+(json module, sorted keys, compact) and the way FastJSONProvider does
+(orjson when installed), then compresses the result with gzip and, if the
+brotli package is installed, brotli.
+"""
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from history import PREDICTIONS
+from indexes import ChildIndex
+from storage import encode_json, json_default, orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def synthetic_children(count, tests_per_child=2, teachers=1, seed=7):
+    """children.json-shaped records spread round-robin over teachers T000001.., shaped like save_test_result writes them"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 6, 9, 0)
+    children = []
+    for i in range(count):
+        child_id = f"C{i:07d}"
+        teacher = 1 + i % teachers
+        teacher_id = f"T{teacher:06d}"
+        tests = []
+        for t in range(tests_per_child):
+            date = start + timedelta(days=rng.randrange(300), seconds=rng.randrange(86400))
+            prediction = rng.choice(PREDICTIONS)
+            tests.append({
+                "testId": f"TEST_{child_id}_{t}",
+                "prediction": prediction,
+                "confidence": round(rng.random(), 4),
+                "interpretation": f"Handwriting sample classified as {prediction.lower()}",
+                "teacherId": teacher_id,
+                "teacherName": f"Teacher {teacher}",
+                "testDate": date.isoformat(),
+                "status": "Completed"
+            })
+        children.append({
+            "childId": child_id,
+            "childName": f"Child {i}",
+            "age": str(6 + i % 6),
+            "grade": f"{1 + i % 5}th",
+            "school": f"School {i % 20}",
+            "teacherId": teacher_id,
+            "registrationDate": start.isoformat(),
+            "status": "Active",
+            "testResults": tests,
+            "lastTestDate": tests[-1]["testDate"] if tests else None,
+            "lastTestResult": tests[-1]["prediction"] if tests else None
+        })
+    return children
+
+
+def test_reports_payload(index, teacher_id):
+    """The body /api/child-test-reports/<teacherId> returns without paging"""
+    pairs, _ = index.test_reports(teacher_id)
+    reports = [{
+        "childId": child['childId'],
+        "childName": child['childName'],
+        "testDate": test.get('testDate'),
+        "result": test.get('prediction'),
+        "confidence": test.get('confidence'),
+        "interpretation": test.get('interpretation'),
+        "testId": test.get('testId'),
+        "teacherId": teacher_id,
+        "teacherName": test.get('teacherName'),
+        "status": test.get('status', 'Completed'),
+        "score": round(test.get('confidence', 0) * 100, 1) if test.get('confidence') else None
+    } for child, test in pairs]
+    return {"success": True, "reports": reports, "totalReports": len(reports), "teacherId": teacher_id}
+
+
+def best_of(runs, fn):
+    """Fastest of several runs in milliseconds (the least disturbed by other work), and the last result"""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def encoders():
+    yield "json (Flask default)", lambda obj: json.dumps(obj, separators=(',', ':'), sort_keys=True, default=json_default).encode('utf-8')
+    yield "orjson" if orjson is not None else "json (no orjson)", lambda obj: encode_json(obj, sort_keys=True)
+
+
+def compressors():
+    yield "identity", lambda body: body
+    yield "gzip-6", lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+    if brotli is not None:
+        yield "brotli-5", lambda body: brotli.compress(body, quality=5)
+
+
+def run(children, tests_per_child, runs):
+    teacher_id = "T000001"
+    index = ChildIndex(synthetic_children(children, tests_per_child))
+    payloads = {
+        "child-test-reports": test_reports_payload(index, teacher_id),
+        "children-by-teacher": {"success": True, "children": index.for_teacher(teacher_id), "count": children},
+    }
+    results = []
+    for name, payload in payloads.items():
+        for encoder_name, encode in encoders():
+            encode_ms, body = best_of(runs, lambda: encode(payload))
+            for compressor_name, compress in compressors():
+                compress_ms, wire = best_of(runs, lambda: compress(body))
+                results.append({
+                    "payload": name,
+                    "encoder": encoder_name,
+                    "encoding": compressor_name,
+                    "encodeMs": round(encode_ms, 2),
+                    "compressMs": round(compress_ms, 2),
+                    "bodyBytes": len(body),
+                    "wireBytes": len(wire)
+                })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--children", type=int, default=5000)
+    parser.add_argument("--tests", type=int, default=4, help="test results per child")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions per measurement (best is reported)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.children, args.tests, args.runs)
+    print(f"{args.children} children x {args.tests} tests, best of {args.runs}")
+    print(f"{'payload':<21}{'encoder':<22}{'encoding':<10}{'encode ms':>10}{'compress ms':>12}{'body':>11}{'wire':>11}")
+    for row in results:
+        print(f"{row['payload']:<21}{row['encoder']:<22}{row['encoding']:<10}{row['encodeMs']:>10.2f}"
+              f"{row['compressMs']:>12.2f}{row['bodyBytes']:>11,}{row['wireBytes']:>11,}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"children": args.children, "testsPerChild": args.tests, "runs": args.runs,
+                       "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""Microbenchmarks for feature extraction, preprocessing, inference and storage.
+
+Run with:  python benchmark.py run                      # everything, saved as benchmark-<time>.json
+           python benchmark.py run --only features,storage --quick --out before.json
+           python benchmark.py compare before.json after.json
+
+Groups:
+  features    extract_stroke_consistency / letter_spacing / alignment and
+              extract_features on synthetic worksheets from 224px to 4000px
+  app         normalize_features and preprocess_image (imports app_fixed, which
+              reads data/ and starts loading the model in the background)
+  inference   batch-1 versus batch-N calls of the Keras backend (and of
+              --backend, if another one is named)
+  storage     full save, load and one-change save for each storage backend,
+              on 1k / 10k / 100k synthetic children in a temporary directory
+  lookups     ChildIndex build and queries against a linear scan of the list
+
+Every measurement is timed with timeit: enough loops to run for at least
+0.2 s, repeated --repeat times; best and median seconds per call are kept.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from bench_json import synthetic_children
+from features import (
+    extract_alignment, extract_features, extract_letter_spacing, extract_stroke_consistency, HandwritingImage
+)
+from indexes import ChildIndex
+from storage import open_store, push_record, STORAGE_BACKENDS
+
+GROUPS = ("features", "app", "inference", "storage", "lookups")
+IMAGE_SIZES = (224, 1000, 2000, 4000)
+CHILD_COUNTS = (1000, 10000, 100000)
+BATCH_SIZES = (1, 8, 32)
+
+
+def measure(fn, repeat):
+    """Best and median seconds per call of fn"""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    per_call = [total / loops for total in timer.repeat(repeat, loops)]
+    return {"best": min(per_call), "median": statistics.median(per_call), "loops": loops, "repeat": repeat}
+
+
+def synthetic_worksheet(size, seed=0):
+    """A size x size BGR page of dark script-font lines on white, standing in for a handwriting scan"""
+    rng = random.Random(seed)
+    img = np.full((size, size, 3), 255, dtype=np.uint8)
+    scale = size / 600
+    lines = max(3, size // 80)
+    for row in range(lines):
+        y = int((row + 1) * size / (lines + 1))
+        x = int(size * 0.05) + rng.randrange(max(1, size // 40))
+        text = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz   ') for _ in range(28))
+        cv2.putText(img, text, (x, y), cv2.FONT_HERSHEY_SCRIPT_SIMPLEX, scale, (40, 40, 40),
+                    max(1, int(2 * scale)), cv2.LINE_AA)
+    return img
+
+
+def bench_features(args):
+    for size in args.sizes:
+        img = synthetic_worksheet(size)
+        params = {"size": size}
+        # extract_features builds the grayscale/binary views once and shares them, so the
+        # individual extractors are timed on prebuilt views (the views' cost shows in extract_features)
+        hw = HandwritingImage(img)
+        _ = hw.binary
+        for fn in (extract_stroke_consistency, extract_letter_spacing, extract_alignment):
+            yield fn.__name__, params, measure(lambda: fn(hw), args.repeat)
+        yield "extract_features", params, measure(lambda: extract_features(img), args.repeat)
+
+
+def bench_app(args):
+    import app_fixed
+
+    features = np.array(extract_features(synthetic_worksheet(224))).reshape(1, -1)
+    yield "normalize_features", {}, measure(lambda: app_fixed.normalize_features(features), args.repeat)
+    for size in args.sizes:
+        img = synthetic_worksheet(size)
+        yield "preprocess_image", {"size": size}, measure(lambda: app_fixed.preprocess_image(img), args.repeat)
+
+
+def bench_inference(args):
+    import tensorflow as tf
+    from inference import load_backend
+
+    if not os.path.exists(args.model):
+        print(f"Skipping inference: {args.model} not found")
+        return
+    model = tf.keras.models.load_model(args.model)
+    names = ["keras"] + ([args.backend] if args.backend != "keras" else [])
+    for name in names:
+        backend = load_backend(name, model, args.model)
+        for batch_size in BATCH_SIZES:
+            inputs = {
+                "image_input": np.random.default_rng(0).random((batch_size, 224, 224, 3), dtype=np.float32),
+                "feature_input": np.zeros((batch_size, 15), dtype=np.float32)
+            }
+            backend.predict(inputs)  # warm up this batch shape
+            timing = measure(lambda: backend.predict(inputs), args.repeat)
+            timing["perImage"] = timing["best"] / batch_size
+            yield "predict", {"backend": backend.name, "batch": batch_size}, timing
+
+
+def bench_storage(args):
+    for count in args.children:
+        children = synthetic_children(count, teachers=50)
+        test = dict(children[0]["testResults"][0], testId="TEST_BENCH")
+        for backend in STORAGE_BACKENDS:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "children.json")
+                store = open_store(backend, path, list, key_field="childId",
+                                   compact_bytes=1 << 40, sqlite_path=os.path.join(tmp, "bench.db"))
+                params = {"backend": backend, "children": count}
+                yield "save_full", params, measure(lambda: store.save(children), args.repeat)
+                yield "load", params, measure(store.load, args.repeat)
+                change = push_record(children[0]["childId"], "testResults", test)
+                yield "save_change", params, measure(lambda: store.save(children, [change]), args.repeat)
+
+
+def bench_lookups(args):
+    for count in args.children:
+        children = synthetic_children(count, teachers=50)
+        rng = random.Random(1)
+        ids = [rng.choice(children)["childId"] for _ in range(100)]
+        params = {"children": count}
+        yield "index_build", params, measure(lambda: ChildIndex(children), args.repeat)
+        index = ChildIndex(children)
+        timing = measure(lambda: [index.get(child_id) for child_id in ids], args.repeat)
+        yield "get_by_id_x100", params, timing
+        timing = measure(lambda: [next(c for c in children if c["childId"] == child_id) for child_id in ids[:10]],
+                         args.repeat)
+        yield "scan_by_id_x10", params, timing
+        yield "for_teacher", params, measure(lambda: index.for_teacher("T000001"), args.repeat)
+        yield "dashboard_stats", params, measure(lambda: index.dashboard_stats("T000001"), args.repeat)
+        yield "search", params, measure(lambda: index.search("child 12", "T000001", 20), args.repeat)
+
+
+BENCHMARKS = {
+    "features": bench_features,
+    "app": bench_app,
+    "inference": bench_inference,
+    "storage": bench_storage,
+    "lookups": bench_lookups,
+}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+def result_key(row):
+    return f"{row['group']}.{row['name']}" + "".join(f" {k}={v}" for k, v in sorted(row["params"].items()))
+
+
+def run(args):
+    results = []
+    for group in args.only:
+        print(f"== {group}")
+        for name, params, timing in BENCHMARKS[group](args):
+            row = {"group": group, "name": name, "params": params, **timing}
+            results.append(row)
+            print(f"  {result_key(row)[len(group) + 1:]:<52} best {row['best'] * 1000:>10.3f} ms"
+                  f"   median {row['median'] * 1000:>10.3f} ms")
+    report = {"environment": environment(), "results": results}
+    out = args.out or f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {out}")
+    return report
+
+
+def compare(args):
+    """Median time of every benchmark present in both runs, new relative to old"""
+    with open(args.old) as f:
+        old = {result_key(row): row for row in json.load(f)["results"]}
+    with open(args.new) as f:
+        new = {result_key(row): row for row in json.load(f)["results"]}
+    print(f"{'benchmark':<60} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for key in (k for k in new if k in old):
+        before, after = old[key]["median"] * 1000, new[key]["median"] * 1000
+        print(f"{key:<60} {before:>10.3f} {after:>10.3f} {after / before - 1:>+8.1%}")
+
+
+def csv_ints(value):
+    return tuple(int(part) for part in value.split(',') if part)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MindTrack microbenchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = commands.add_parser("run", help="Run benchmarks and save the results as JSON")
+    run_cmd.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated groups ({', '.join(GROUPS)})")
+    run_cmd.add_argument("--quick", action="store_true", help="fewer repeats, image sizes and child counts")
+    run_cmd.add_argument("--repeat", type=int, default=None, help="timing repeats per benchmark (default 5, quick 3)")
+    run_cmd.add_argument("--sizes", type=csv_ints, default=None, help="image sizes, e.g. 224,1000,2000,4000")
+    run_cmd.add_argument("--children", type=csv_ints, default=None, help="child counts, e.g. 1000,10000,100000")
+    run_cmd.add_argument("--model", default="dysgraphia_model.keras")
+    run_cmd.add_argument("--backend", default=os.environ.get('INFERENCE_BACKEND', 'keras').lower(),
+                         help="inference backend compared against keras")
+    run_cmd.add_argument("--out", default=None, help="results file (default benchmark-<time>.json)")
+
+    compare_cmd = commands.add_parser("compare", help="Compare two result files")
+    compare_cmd.add_argument("old")
+    compare_cmd.add_argument("new")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        compare(args)
+        return 0
+
+    args.only = [group.strip() for group in args.only.split(',') if group.strip()]
+    unknown = [group for group in args.only if group not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(unknown)}")
+    args.repeat = args.repeat or (3 if args.quick else 5)
+    args.sizes = args.sizes or ((224, 1000) if args.quick else IMAGE_SIZES)
+    args.children = args.children or ((1000, 10000) if args.quick else CHILD_COUNTS)
+    run(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
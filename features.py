@@ -0,0 +1,295 @@
+import multiprocessing
+import struct
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# Feature extraction lives here (not in app_fixed) so pool worker processes
+# can import it without pulling in TensorFlow and the model.
+
+IMAGE_SIZE = (224, 224)
+
+REDUCED_DECODE_FLAGS = (
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+)
+
+
+class ImageTooLarge(ValueError):
+    """Upload exceeds the configured byte or pixel limits"""
+
+
+def image_dimensions(image_bytes):
+    """(width, height) read from a JPEG/PNG/GIF header without decoding, or None"""
+    data = memoryview(image_bytes)
+    if data[:8].tobytes() == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        return struct.unpack('>II', data[16:24])
+    if data[:6].tobytes() in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+    if data[:2].tobytes() != b'\xff\xd8':
+        return None
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+            i += 1 if marker == 0xFF else 2
+            continue
+        # SOFn frame headers carry the dimensions (C4/C8/CC are not frames)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + struct.unpack('>H', data[i + 2:i + 4])[0]
+    return None
+
+def decode_image(image_bytes, pixel_budget=None, max_pixels=None):
+    """Decode image bytes into a BGR array without touching disk.
+
+    Images over max_pixels are rejected from their header before decoding.
+    Images over pixel_budget are decoded at 1/2, 1/4 or 1/8 scale (JPEG DCT
+    scaling) and, if still too large, downscaled to fit the budget.
+    """
+    dims = image_dimensions(image_bytes)
+    if dims and max_pixels and dims[0] * dims[1] > max_pixels:
+        raise ImageTooLarge(f"Image is {dims[0]}x{dims[1]}; the limit is {max_pixels} pixels")
+
+    # Smallest reduction that fits the budget; 1/8 is the most the decoder offers
+    flag = cv2.IMREAD_COLOR
+    if dims and pixel_budget and dims[0] * dims[1] > pixel_budget:
+        for factor, flag in REDUCED_DECODE_FLAGS:
+            if (dims[0] // factor) * (dims[1] // factor) <= pixel_budget:
+                break
+
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    img = cv2.imdecode(buffer, flag) if buffer.size else None
+    if img is None:
+        raise ValueError("Could not decode uploaded image")
+
+    pixels = img.shape[0] * img.shape[1]
+    if not dims and max_pixels and pixels > max_pixels:
+        raise ImageTooLarge(f"Image is {img.shape[1]}x{img.shape[0]}; the limit is {max_pixels} pixels")
+    if pixel_budget and pixels > pixel_budget:
+        scale = (pixel_budget / pixels) ** 0.5
+        size = (max(1, int(img.shape[1] * scale)), max(1, int(img.shape[0] * scale)))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return img
+
+
+class HandwritingImage:
+    """Grayscale and Otsu binary views of an image, computed once and shared by the extractors"""
+
+    def __init__(self, img):
+        self.width = img.shape[1]
+        self.gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) > 2 else img
+        self._binary = None
+
+    @property
+    def binary(self):
+        if self._binary is None:
+            _, self._binary = cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        return self._binary
+
+def as_handwriting_image(img):
+    return img if isinstance(img, HandwritingImage) else HandwritingImage(img)
+
+def extract_stroke_consistency(img):
+    """Measure stroke consistency based on intensity variations"""
+    hw = as_handwriting_image(img)
+    blurred = cv2.GaussianBlur(hw.gray, (5, 5), 0)
+    edges = cv2.Canny(blurred, 50, 150)
+    if np.count_nonzero(edges) > 0:
+        return np.std(edges[edges > 0]) / 255.0
+    return 0.0
+
+def extract_letter_spacing(img):
+    """Measure letter spacing using horizontal projection"""
+    hw = as_handwriting_image(img)
+    # Binary pixels are 0/255, so counting them equals np.sum(binary) / 255
+    h_proj = np.count_nonzero(hw.binary, axis=0)
+
+    # Local maxima above the noise floor
+    inner = h_proj[1:-1]
+    is_peak = (inner > h_proj[:-2]) & (inner > h_proj[2:]) & (inner > 5)
+    peaks = np.flatnonzero(is_peak) + 1
+
+    if len(peaks) > 1:
+        return np.std(np.diff(peaks)) / hw.width
+    return 0.0
+
+def extract_alignment(img):
+    """Measure alignment of text lines"""
+    hw = as_handwriting_image(img)
+    binary = hw.binary
+    v_proj = np.count_nonzero(binary, axis=1)
+    text_rows = np.flatnonzero(v_proj > binary.shape[1] * 0.1)
+
+    if len(text_rows):
+        # Split text rows into lines wherever the gap exceeds 2 rows
+        bounds = np.concatenate(([0], np.flatnonzero(np.diff(text_rows) > 2) + 1, [len(text_rows)]))
+        keep = np.diff(bounds) > 5
+        starts = text_rows[bounds[:-1][keep]]
+        ends = text_rows[bounds[1:][keep] - 1]
+
+        if len(starts) > 1:
+            # Left margin of each line is the first ink column within rows [start, end)
+            row_has_ink = binary.any(axis=1)
+            first_col = np.where(row_has_ink, binary.argmax(axis=1), binary.shape[1])
+            spans = np.column_stack((starts, ends)).ravel()
+            margins = np.minimum.reduceat(first_col, spans)[::2]
+            margins = margins[margins < binary.shape[1]]
+
+            if len(margins) > 1:
+                return np.std(margins) / hw.width
+
+    return 0.0
+
+def extract_features(image):
+    """Extract multiple handwriting features from an image"""
+    hw = HandwritingImage(image)
+    features = {
+        'stroke_consistency': extract_stroke_consistency(hw),
+        'letter_spacing': extract_letter_spacing(hw),
+        'alignment': extract_alignment(hw)
+    }
+    
+    feature_vector = [
+        features['stroke_consistency'],
+        features['letter_spacing'],
+        features['alignment'],
+        0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+    ]
+
+    return feature_vector[:15]
+
+def image_to_tensor(img, out=None):
+    """Resize a BGR image to the CNN input: RGB float32 in [0, 1], shape (1, 224, 224, 3)"""
+    resized = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), IMAGE_SIZE)
+    if out is None:
+        out = np.empty((1, IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.float32)
+    np.divide(resized, np.float32(255.0), out=out[0])
+    return out
+
+def working_image(img, working_size):
+    """Resize to the fixed square feature resolution (training extracted features at 224x224)"""
+    if not working_size or img.shape[:2] == (working_size, working_size):
+        return img
+    return cv2.resize(img, (working_size, working_size))
+
+def prepare_image(img, working_size=None):
+    """CNN tensor and raw handwriting feature vector for one decoded image"""
+    work = working_image(img, working_size)
+    # At the CNN size the working image is the tensor's resize, so reuse it
+    tensor = image_to_tensor(work if work.shape[:2] == (IMAGE_SIZE[1], IMAGE_SIZE[0]) else img)
+    return tensor, extract_features(work)
+
+def _prepare_shared(in_name, shape, dtype, out_name, working_size):
+    """Process-pool worker: read the image from shared memory, write the tensor back into shared memory"""
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    try:
+        img = np.ndarray(shape, dtype=dtype, buffer=shm_in.buf)
+        out = np.ndarray((1, IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.float32, buffer=shm_out.buf)
+        work = working_image(img, working_size)
+        image_to_tensor(work if work.shape[:2] == (IMAGE_SIZE[1], IMAGE_SIZE[0]) else img, out=out)
+        features = extract_features(work)
+        del img, work, out
+        return features
+    finally:
+        shm_in.close()
+        shm_out.close()
+
+
+class FeaturePool:
+    """Run preprocessing and feature extraction inline, on threads or on worker processes.
+
+    In process mode images travel through shared memory rather than being
+    pickled; only the 15-value feature vector comes back through the pipe.
+    Workers are spawned, and spawn re-imports the parent's __main__ in each
+    of them, so process mode needs a main module that is cheap to import
+    (gunicorn or uvicorn); `python app_fixed.py` would load the app again
+    in every worker.
+    """
+
+    MODES = ("none", "thread", "process")
+
+    def __init__(self, mode="thread", workers=None, working_size=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown feature pool mode '{mode}' (expected one of {', '.join(self.MODES)})")
+        self.mode = mode
+        self.workers = workers or multiprocessing.cpu_count()
+        self.working_size = working_size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "process":
+                        # spawn: never fork a process that already runs TensorFlow threads
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn")
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="features")
+        return self._executor
+
+    def submit(self, img):
+        """Return a Future resolving to (tensor, features) for a decoded image"""
+        if self.mode == "none":
+            future = Future()
+            try:
+                future.set_result(prepare_image(img, self.working_size))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self.mode == "thread":
+            return self._get_executor().submit(prepare_image, img, self.working_size)
+        return self._submit_shared(np.ascontiguousarray(img))
+
+    def _submit_shared(self, img):
+        shm_in = shared_memory.SharedMemory(create=True, size=max(1, img.nbytes))
+        shm_out = shared_memory.SharedMemory(create=True, size=IMAGE_SIZE[0] * IMAGE_SIZE[1] * 3 * 4)
+        np.ndarray(img.shape, dtype=img.dtype, buffer=shm_in.buf)[...] = img
+        result = Future()
+
+        def release(_):
+            shm_in.close()
+            shm_in.unlink()
+            shm_out.close()
+            shm_out.unlink()
+
+        def finish(worker_future):
+            try:
+                features = worker_future.result()
+                tensor = np.ndarray((1, IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.float32, buffer=shm_out.buf).copy()
+                result.set_result((tensor, features))
+            except Exception as e:
+                result.set_exception(e)
+            finally:
+                release(None)
+
+        try:
+            worker_future = self._get_executor().submit(
+                _prepare_shared, shm_in.name, img.shape, img.dtype.str, shm_out.name, self.working_size
+            )
+        except Exception:
+            release(None)
+            raise
+        worker_future.add_done_callback(finish)
+        return result
+
+    def run(self, img):
+        return self.submit(img).result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
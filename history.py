@@ -0,0 +1,167 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+# A saved test result, in the key order save_test_result writes it
+TEST_FIELDS = ('testId', 'prediction', 'confidence', 'interpretation', 'teacherId', 'teacherName', 'testDate', 'status')
+PREDICTIONS = ('Non-dysgraphic', 'Dysgraphic')
+PREDICTION_CODES = {label: code for code, label in enumerate(PREDICTIONS)}
+
+_FLOAT32 = struct.Struct('f')
+
+
+def to_float32(value):
+    return _FLOAT32.unpack(_FLOAT32.pack(value))[0]
+
+
+@lru_cache(maxsize=65536)
+def shortest_float32(value):
+    """The shortest decimal that reads back as the same float32 (what the value looked like when stored)"""
+    for digits in range(6, 10):
+        candidate = float(f"{value:.{digits}g}")
+        if to_float32(candidate) == value:
+            return candidate
+    return value
+
+
+def compact_confidence(value):
+    """value as a float32, or None if float32 would not give back exactly the same number"""
+    if type(value) is not float:
+        return None
+    try:
+        stored = to_float32(value)
+    except OverflowError:
+        return None
+    return stored if shortest_float32(stored) == value else None
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class TestHistory:
+    """One child's test results as compact columns, sorted by testDate.
+
+    Predictions are stored as enum codes and confidences as float32. Strings
+    that repeat across tests (teacher, interpretation, status) are interned.
+    A result that does not fit the usual shape, for example extra keys or an
+    unknown label, is kept whole in a fallback column, so every result reads
+    back exactly as it was saved. It behaves like the list it replaces:
+    len(), indexing, iteration, `in` and append(), and it serializes as a list.
+    """
+
+    __slots__ = ('dates', 'test_ids', 'predictions', 'confidences', 'interpretations',
+                 'teacher_ids', 'teacher_names', 'statuses', 'fallback')
+
+    def __init__(self, tests=()):
+        self.dates = []
+        self.test_ids = []
+        self.predictions = array('b')
+        self.confidences = array('f')
+        self.interpretations = []
+        self.teacher_ids = []
+        self.teacher_names = []
+        self.statuses = []
+        self.fallback = []
+        for test in sorted(tests, key=self._date_key):
+            self.append(test)
+
+    @staticmethod
+    def _date_key(test):
+        date = test.get('testDate') if isinstance(test, dict) else None
+        return date if isinstance(date, str) else ''
+
+    def append(self, test):
+        """Insert a result at its place in testDate order (after any with the same date)"""
+        date = self._date_key(test)
+        i = bisect_right(self.dates, date)
+        self.dates.insert(i, date)
+
+        compact = isinstance(test, dict) and tuple(test) == TEST_FIELDS and isinstance(test['testId'], str)
+        code = PREDICTION_CODES.get(test['prediction']) if compact else None
+        confidence = compact_confidence(test['confidence']) if compact else None
+        if code is None or confidence is None or not isinstance(test['testDate'], str):
+            self.test_ids.insert(i, None)
+            self.predictions.insert(i, -1)
+            self.confidences.insert(i, 0.0)
+            for column in (self.interpretations, self.teacher_ids, self.teacher_names, self.statuses):
+                column.insert(i, None)
+            self.fallback.insert(i, test)
+            return
+
+        self.test_ids.insert(i, test['testId'])
+        self.predictions.insert(i, code)
+        self.confidences.insert(i, confidence)
+        self.interpretations.insert(i, _intern(test['interpretation']))
+        self.teacher_ids.insert(i, _intern(test['teacherId']))
+        self.teacher_names.insert(i, _intern(test['teacherName']))
+        self.statuses.insert(i, _intern(test['status']))
+        self.fallback.insert(i, None)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __bool__(self):
+        return bool(self.dates)
+
+    def _row(self, i):
+        if self.fallback[i] is not None:
+            return self.fallback[i]
+        return {
+            "testId": self.test_ids[i],
+            "prediction": PREDICTIONS[self.predictions[i]],
+            "confidence": shortest_float32(self.confidences[i]),
+            "interpretation": self.interpretations[i],
+            "teacherId": self.teacher_ids[i],
+            "teacherName": self.teacher_names[i],
+            "testDate": self.dates[i],
+            "status": self.statuses[i]
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("test index out of range")
+        return self._row(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def __contains__(self, test):
+        date = self._date_key(test)
+        start = bisect_left(self.dates, date)
+        end = bisect_right(self.dates, date, lo=start)
+        return any(self._row(i) == test for i in range(start, end))
+
+    def __eq__(self, other):
+        if isinstance(other, (TestHistory, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def select(self, start=None, end=None, last=None):
+        """Results with start <= testDate <= end, oldest first, keeping only the last `last` of them.
+
+        Dates compare as ISO strings, so a date-only end covers that whole day.
+        """
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end + '\uffff') if end else len(self)
+        if last is not None:
+            lo = max(lo, hi - last)
+        return self[lo:hi]
+
+    def to_json(self):
+        return list(self)
+
+
+def compact_tests(child):
+    """Swap a child's plain testResults list for a TestHistory, in place"""
+    tests = child.get('testResults')
+    if isinstance(tests, list):
+        child['testResults'] = TestHistory(tests)
+    return child.get('testResults')
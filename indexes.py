@@ -0,0 +1,438 @@
+import base64
+import heapq
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
+
+from history import TestHistory, compact_tests
+
+# A registration is "recent" on the dashboard while (now - registrationDate).days <= 7
+RECENT_REGISTRATION_DAYS = 7
+
+
+def encode_cursor(position):
+    """Opaque pagination cursor for a position in an ordered index"""
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def page_after(seqs, items, after, limit):
+    """Items whose sequence number is greater than after, at most limit of them.
+
+    seqs is sorted and parallel to items. Returns (page, last seq of the page if
+    more items follow, else None).
+    """
+    start = bisect_right(seqs, after) if after is not None else 0
+    page = items[start:start + limit]
+    if start + limit < len(items):
+        return page, seqs[start + limit - 1]
+    return page, None
+
+
+def test_date_key(test):
+    date = test.get('testDate')
+    return date if isinstance(date, str) else ''
+
+
+def test_id_key(test):
+    test_id = test.get('testId') if isinstance(test, dict) else None
+    return test_id if isinstance(test_id, str) else ''
+
+
+def child_status(child):
+    """Children registered before soft delete existed have no status and count as Active"""
+    return child.get('status', 'Active')
+
+
+def registration_timestamp(child):
+    """registrationDate as a POSIX timestamp, or None if it is missing or unparseable"""
+    value = child.get('registrationDate')
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def stats_contribution(child):
+    """What one active child adds to its teacher's dashboard counters"""
+    return (bool(child.get('testResults')), child.get('lastTestResult'), registration_timestamp(child))
+
+
+class TeacherStats:
+    """Running dashboard counters over one teacher's active children"""
+
+    def __init__(self):
+        self.total = 0
+        self.with_tests = 0
+        self.dysgraphic = 0
+        self.non_dysgraphic = 0
+        # Sorted registration timestamps; ones that aged out of the window are dropped on read
+        self.registrations = []
+
+    def apply(self, contribution, sign):
+        has_tests, last_result, registered = contribution
+        self.total += sign
+        if has_tests:
+            self.with_tests += sign
+        if last_result == 'Dysgraphic':
+            self.dysgraphic += sign
+        elif last_result:
+            self.non_dysgraphic += sign
+        if registered is None:
+            return
+        if sign > 0:
+            insort(self.registrations, registered)
+        else:
+            # Already gone if it aged out of the window
+            i = bisect_left(self.registrations, registered)
+            if i < len(self.registrations) and self.registrations[i] == registered:
+                del self.registrations[i]
+
+    def recent_registrations(self, now):
+        cutoff = now - (RECENT_REGISTRATION_DAYS + 1) * 86400
+        stale = bisect_right(self.registrations, cutoff)
+        if stale:
+            del self.registrations[:stale]
+        return len(self.registrations)
+
+    def as_dict(self, now):
+        return {
+            "totalChildren": self.total,
+            "childrenWithTests": self.with_tests,
+            "childrenWithoutTests": self.total - self.with_tests,
+            "dysgraphicResults": self.dysgraphic,
+            "nonDysgraphicResults": self.non_dysgraphic,
+            "recentRegistrations": self.recent_registrations(now)
+        }
+
+
+SEARCH_FIELDS = ('childName', 'childId', 'school')
+
+
+def search_fields(child):
+    """Lowercased name, id and school, as search_children matches them"""
+    return tuple('' if child.get(field) is None else str(child.get(field)).lower() for field in SEARCH_FIELDS)
+
+
+def ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def match_rank(fields, query):
+    """Lower is better: exact id, name prefix, name word prefix, id prefix, school prefix, anywhere"""
+    name, child_id, school = fields
+    if child_id == query:
+        return 0
+    if name.startswith(query):
+        return 1
+    if f" {query}" in name:
+        return 2
+    if child_id.startswith(query):
+        return 3
+    if school.startswith(query) or f" {query}" in school:
+        return 4
+    return 5
+
+
+class SearchIndex:
+    """Bigram/trigram inverted index over active children's name, id and school.
+
+    A child matches when the query is a substring of "name id school" (the
+    text search_children always matched against). Two- and three-character
+    queries are a single posting lookup; longer ones intersect their trigram
+    postings, smallest first, and confirm with a substring check.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.texts = {}
+        self.fields = {}
+
+    def _grams(self, text):
+        return ngrams(text, 2) | ngrams(text, 3)
+
+    def put(self, child_id, fields):
+        """Index a child under fields, or drop it from the index if fields is None"""
+        text = " ".join(fields) if fields is not None else None
+        old_text = self.texts.get(child_id)
+        if old_text == text:
+            return
+        if old_text is not None:
+            for gram in self._grams(old_text):
+                bucket = self.postings[gram]
+                bucket.discard(child_id)
+                if not bucket:
+                    del self.postings[gram]
+            del self.texts[child_id], self.fields[child_id]
+        if text is not None:
+            for gram in self._grams(text):
+                self.postings.setdefault(gram, set()).add(child_id)
+            self.texts[child_id] = text
+            self.fields[child_id] = fields
+
+    def candidates(self, query, within=None):
+        """childIds whose text contains query; within optionally restricts the search"""
+        if len(query) < 2:
+            pool = self.texts if within is None else within
+            return [child_id for child_id in pool if query in self.texts.get(child_id, '')]
+        if len(query) <= 3:
+            found = self.postings.get(query, set())
+        else:
+            buckets = sorted((self.postings.get(gram, set()) for gram in ngrams(query, 3)), key=len)
+            found = buckets[0].intersection(*buckets[1:])
+        if within is not None:
+            if len(within) < len(found):
+                found = [child_id for child_id in within if child_id in found]
+            else:
+                found = [child_id for child_id in found if child_id in within]
+        if len(query) <= 3:
+            return list(found)
+        return [child_id for child_id in found if query in self.texts[child_id]]
+
+
+class ChildIndex:
+    """In-memory hash indexes over children_db.
+
+    by_id maps childId -> record, by_teacher maps teacherId -> {childId: record} in
+    registration order, and by_status partitions each teacher's children by status.
+    stats holds each teacher's dashboard counters. The records are the same dicts
+    held in children_db, so plain field edits show up immediately; call reindex()
+    after changing a child's teacherId, status, test results or registrationDate.
+    Indexing a child also moves its testResults into a compact TestHistory.
+
+    Every add() or reindex() bumps a version counter for the whole collection,
+    for the child and for its teacher(s); version() lets readers cache what
+    they built from that data until it changes.
+    """
+
+    def __init__(self, children=()):
+        self.lock = threading.RLock()
+        self.generation = 0
+        self.rebuild(children)
+
+    def rebuild(self, children):
+        with self.lock:
+            # Versions restart with the rebuild, so the generation keeps them distinct from earlier ones
+            self.generation += 1
+            self.versions = {}
+            self.by_id = {}
+            self.by_teacher = {}
+            self.by_status = {}
+            self.stats = {}
+            self.seq = {}
+            self._teacher_order = {}
+            self._test_keys = {}
+            self._keys = {}
+            self._contributions = {}
+            self.search_index = SearchIndex()
+            for child in children:
+                self.add(child)
+
+    def add(self, child):
+        with self.lock:
+            child_id = child.get('childId')
+            key = (child.get('teacherId'), child_status(child))
+            old_key = self._keys.get(child_id)
+            seq = self.seq.setdefault(child_id, len(self.seq))
+            if old_key is not None and old_key[0] != key[0]:
+                self._discard(self.by_teacher, old_key[0], child_id)
+                seqs, members = self._teacher_order[old_key[0]]
+                i = bisect_left(seqs, seq)
+                del seqs[i], members[i]
+            if old_key is not None:
+                self._discard(self.by_status, old_key, child_id)
+            if old_key is None or old_key[0] != key[0]:
+                seqs, members = self._teacher_order.setdefault(key[0], ([], []))
+                i = bisect_left(seqs, seq)
+                seqs.insert(i, seq)
+                members.insert(i, child)
+            elif self.by_id[child_id] is not child:
+                # The same child as a new record (a replayed "set"): swap it into the teacher's list
+                seqs, members = self._teacher_order[key[0]]
+                members[bisect_left(seqs, seq)] = child
+            self.by_id[child_id] = child
+            self.by_teacher.setdefault(key[0], {})[child_id] = child
+            self.by_status.setdefault(key, {})[child_id] = child
+            self._keys[child_id] = key
+            self._count(child_id, key, child)
+            self._index_tests(child_id, child)
+            self._index_search(child_id, key, child)
+            self._bump(child_id, key[0], old_key[0] if old_key is not None else None)
+
+    def _bump(self, child_id, *teacher_ids):
+        keys = [('children',), ('child', child_id)]
+        keys += [('teacher', teacher_id) for teacher_id in set(teacher_ids) if teacher_id is not None]
+        for version_key in keys:
+            self.versions[version_key] = self.versions.get(version_key, 0) + 1
+
+    def version(self, *key):
+        """Opaque version of ('children',), ('child', childId) or ('teacher', teacherId); changes on every write to it"""
+        with self.lock:
+            return self.generation, self.versions.get(key, 0)
+
+    def _index_search(self, child_id, key, child):
+        # Deactivated children drop out of search, as they always did
+        self.search_index.put(child_id, search_fields(child) if key[1] != 'Inactive' else None)
+
+    def _index_tests(self, child_id, child):
+        """The child's tests as (testDate, -seq, testId, position) keys, ascending.
+
+        Walking every active child's list backwards and merging gives the
+        child-test-reports order: newest first, ties in registration order,
+        then by testId. Positions shift when a back-dated test is inserted,
+        so they only locate the test and never take part in a cursor.
+        """
+        seq = self.seq[child_id]
+        tests = compact_tests(child) or ()
+        if isinstance(tests, TestHistory):
+            dates = tests.dates
+            test_ids = [test_id if test_id is not None else test_id_key(fallback)
+                        for test_id, fallback in zip(tests.test_ids, tests.fallback)]
+        else:
+            dates = [test_date_key(test) for test in tests]
+            test_ids = [test_id_key(test) for test in tests]
+        keys = [(date, -seq, test_id, i) for i, (date, test_id) in enumerate(zip(dates, test_ids))]
+        keys.sort()
+        self._test_keys[child_id] = keys
+
+    def _count(self, child_id, key, child):
+        """Move the child's contribution to the dashboard counters to its current values"""
+        old = self._contributions.pop(child_id, None)
+        if old is not None:
+            self.stats[old[0]].apply(old[1], -1)
+        if key[1] == 'Active':
+            contribution = stats_contribution(child)
+            self.stats.setdefault(key[0], TeacherStats()).apply(contribution, 1)
+            self._contributions[child_id] = (key[0], contribution)
+
+    @staticmethod
+    def _discard(index, key, child_id):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(child_id, None)
+            if not bucket:
+                del index[key]
+
+    def reindex(self, child):
+        """Bring the buckets and counters up to date after a child was modified"""
+        with self.lock:
+            key = (child.get('teacherId'), child_status(child))
+            if self._keys.get(child.get('childId')) != key:
+                self.add(child)
+            else:
+                self._count(child.get('childId'), key, child)
+                self._index_tests(child.get('childId'), child)
+                self._index_search(child.get('childId'), key, child)
+                self._bump(child.get('childId'), key[0])
+
+    def get(self, child_id):
+        return self.by_id.get(child_id)
+
+    def __contains__(self, child_id):
+        return child_id in self.by_id
+
+    def for_teacher(self, teacher_id, status=None):
+        """A teacher's children in registration order, optionally only those with the given status"""
+        with self.lock:
+            if status is None:
+                return list(self.by_teacher.get(teacher_id, {}).values())
+            return list(self.by_status.get((teacher_id, status), {}).values())
+
+    def page_for_teacher(self, teacher_id, after, limit):
+        """A page of a teacher's children in registration order; after is a seq from a previous page"""
+        with self.lock:
+            seqs, members = self._teacher_order.get(teacher_id, ([], []))
+            return page_after(seqs, members, after, limit)
+
+    def test_reports(self, teacher_id, after=None, limit=None):
+        """(child, test) pairs for a teacher's active children, newest test first.
+
+        A k-way merge over each child's already-ordered tests, so a page costs
+        O(children + limit) however long the test history is. after is the
+        (testDate, seq, testId) of the last pair of the previous page. Returns
+        (pairs, cursor position of the last pair if more follow, else None).
+        """
+        with self.lock:
+            streams = []
+            for child_id, child in self.by_status.get((teacher_id, 'Active'), {}).items():
+                keys = self._test_keys.get(child_id)
+                if not keys:
+                    continue
+                end = len(keys) if after is None else bisect_left(keys, (after[0], -after[1], after[2]))
+                streams.append(self._newest_first(keys, end, child))
+            merged = heapq.merge(*streams, reverse=True)
+            pairs = list(merged if limit is None else islice(merged, limit + 1))
+        cursor = None
+        if limit is not None and len(pairs) > limit:
+            pairs = pairs[:limit]
+            date, neg_seq, test_id, _ = pairs[-1][0]
+            cursor = [date, -neg_seq, test_id]
+        return [(child, child['testResults'][key[3]]) for key, child in pairs], cursor
+
+    @staticmethod
+    def _newest_first(keys, end, child):
+        for i in range(end - 1, -1, -1):
+            yield keys[i], child
+
+    def search(self, query, teacher_id=None, limit=None):
+        """Active children whose name, id or school contains query (lowercased), best matches first"""
+        with self.lock:
+            within = self.by_teacher.get(teacher_id, {}) if teacher_id else None
+            matches = self.search_index.candidates(query, within)
+            fields = self.search_index.fields
+            rank = lambda child_id: (match_rank(fields[child_id], query), self.seq[child_id])
+            if limit is None:
+                matches.sort(key=rank)
+            else:
+                matches = heapq.nsmallest(limit, matches, key=rank)
+            return [self.by_id[child_id] for child_id in matches]
+
+    def dashboard_stats(self, teacher_id, now=None):
+        """Dashboard counters for a teacher's active children, without scanning them"""
+        with self.lock:
+            stats = self.stats.get(teacher_id) or TeacherStats()
+            return stats.as_dict(now if now is not None else datetime.now().timestamp())
+
+
+class ReportIndex:
+    """teacherId -> that teacher's problem reports in submission order.
+
+    A report's sequence number is its position in teacher_reports, which only
+    ever grows, so it doubles as a stable pagination cursor.
+    """
+
+    def __init__(self, reports=()):
+        self.lock = threading.RLock()
+        self.rebuild(reports)
+
+    def rebuild(self, reports):
+        with self.lock:
+            self._by_teacher = {}
+            for seq, report in enumerate(reports):
+                self.add(report, seq)
+
+    def add(self, report, seq):
+        with self.lock:
+            seqs, items = self._by_teacher.setdefault(report.get('teacherId'), ([], []))
+            seqs.append(seq)
+            items.append(report)
+
+    def for_teacher(self, teacher_id):
+        with self.lock:
+            return list(self._by_teacher.get(teacher_id, ([], []))[1])
+
+    def page_for_teacher(self, teacher_id, after, limit):
+        with self.lock:
+            seqs, items = self._by_teacher.get(teacher_id, ([], []))
+            return page_after(seqs, items, after, limit)
@@ -0,0 +1,518 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+log = logging.getLogger('mindtrack')
+
+
+class BatchingPredictor:
+    """Gather concurrent single-image predictions into one model batch"""
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        # A request that did not fit in the previous batch; it starts the next one
+        self._held = None
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        """Start the batching thread on first use (safe after gunicorn fork)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="predict-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, image_input, feature_input):
+        """Queue one request and return a Future resolving to its output row"""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((np.asarray(image_input), np.asarray(feature_input), future))
+        return future
+
+    def predict(self, image_input, feature_input, timeout=None):
+        """Blocking helper: submit one request and wait for its output row"""
+        return self.submit(image_input, feature_input).result(timeout=timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or the wait expires"""
+        first, self._held = self._held, None
+        batch = [first if first is not None else self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        rows = batch[0][0].shape[0]
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if rows + item[0].shape[0] > self.max_batch_size:
+                self._held = item
+                break
+            batch.append(item)
+            rows += item[0].shape[0]
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                images = np.concatenate([item[0] for item in batch], axis=0)
+                features = np.concatenate([item[1] for item in batch], axis=0)
+                outputs = np.asarray(self.predict_fn({
+                    "image_input": images,
+                    "feature_input": features
+                }))
+            except Exception as e:
+                for item in batch:
+                    item[2].set_exception(e)
+                continue
+
+            # Hand every request back the rows it contributed
+            offset = 0
+            for image_input, _, future in batch:
+                count = image_input.shape[0]
+                future.set_result(outputs[offset:offset + count])
+                offset += count
+
+
+class PredictionCache:
+    """LRU + TTL cache of prediction results keyed by image content and model version"""
+
+    # Seconds between disk sweeps while the directory stays under its caps
+    DISK_SWEEP_INTERVAL = 60.0
+
+    def __init__(self, max_entries=512, ttl_seconds=3600, disk_dir=None, disk_max_entries=10000,
+                 disk_max_bytes=64 * 1024 * 1024):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.disk_dir = disk_dir or None
+        self.disk_max_entries = max(0, int(disk_max_entries))
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        # Estimated disk usage since the last sweep (other workers write to the same directory)
+        self._disk_count = 0
+        self._disk_bytes = 0
+        self._last_sweep = 0.0
+        self._sweeping = False
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_bytes, model_version):
+        """Content address: hash of the upload bytes plus the loaded model's version"""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{model_version}-{digest}"
+
+    def _expired(self, created):
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._memory_put(key, value, time.time())
+        return value
+
+    def put(self, key, value):
+        """Store a JSON-serializable value in memory and, if enabled, on disk"""
+        created = time.time()
+        self._memory_put(key, value, created)
+        self._disk_put(key, value, created)
+
+    def _memory_put(self, key, value, created):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(record.get('created', 0)):
+            self._disk_remove(path)
+            return None
+        try:
+            # The sweep evicts by mtime, so a hit keeps the entry
+            os.utime(path)
+        except OSError:
+            pass
+        return record.get('value')
+
+    @staticmethod
+    def _disk_remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _disk_put(self, key, value, created):
+        if not self.disk_dir:
+            return
+        # Write-then-rename so other workers never read a partial entry
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({"created": created, "value": value}, f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except OSError:
+            log.warning("Error writing prediction cache entry %s", key, exc_info=True)
+            return
+        with self._lock:
+            self._disk_count += 1
+            self._disk_bytes += size
+            due = (self._disk_count > self.disk_max_entries > 0 or self._disk_bytes > self.disk_max_bytes > 0
+                   or time.monotonic() - self._last_sweep > self.DISK_SWEEP_INTERVAL)
+            if not due or self._sweeping:
+                return
+            self._sweeping = True
+        threading.Thread(target=self._sweep_disk, name="prediction-cache-sweep", daemon=True).start()
+
+    def _sweep_disk(self):
+        """Delete expired entries, then the least recently used ones until the directory fits its caps"""
+        try:
+            entries = []
+            now = time.time()
+            with os.scandir(self.disk_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            entries.sort()
+            count = len(entries)
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for mtime, size, path in entries:
+                # mtime is at least the creation time, so these are expired for sure
+                stale = self.ttl > 0 and now - mtime > self.ttl
+                over = (count > self.disk_max_entries > 0) or (total > self.disk_max_bytes > 0)
+                if not stale and not over:
+                    break
+                if self._disk_remove(path):
+                    evicted += 1
+                count -= 1
+                total -= size
+            with self._lock:
+                self._disk_count = count
+                self._disk_bytes = total
+                self.disk_evictions += evicted
+        finally:
+            with self._lock:
+                self._last_sweep = time.monotonic()
+                self._sweeping = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl,
+                "diskTier": bool(self.disk_dir),
+                "diskEvictions": self.disk_evictions
+            }
+
+
+IMAGE_SIZE = (224, 224)
+NUM_FEATURES = 15
+
+
+class KerasBackend:
+    """Serve the loaded Keras model through model.predict"""
+
+    name = "keras"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, inputs):
+        return self.model.predict(inputs, verbose=0)
+
+
+class CompiledBackend:
+    """Call the Keras model directly through a tf.function with a fixed input signature"""
+
+    name = "compiled"
+
+    def __init__(self, model):
+        import tensorflow as tf
+
+        self.model = model
+        signature = [
+            tf.TensorSpec((None, IMAGE_SIZE[0], IMAGE_SIZE[1], 3), tf.float32, name="image_input"),
+            tf.TensorSpec((None, NUM_FEATURES), tf.float32, name="feature_input")
+        ]
+
+        @tf.function(input_signature=signature)
+        def serve(image_input, feature_input):
+            return model({"image_input": image_input, "feature_input": feature_input}, training=False)
+
+        self._serve = serve
+
+    def predict(self, inputs):
+        image_input = np.asarray(inputs["image_input"], dtype=np.float32)
+        feature_input = np.asarray(inputs["feature_input"], dtype=np.float32)
+        return self._serve(image_input, feature_input).numpy()
+
+
+class TFLiteBackend:
+    """Run an exported .tflite model with the TFLite interpreter"""
+
+    name = "tflite"
+
+    def __init__(self, tflite_path, num_threads=None):
+        import tensorflow as tf
+
+        self.path = tflite_path
+        self.interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=num_threads)
+        self._lock = threading.Lock()
+        self._batch_size = None
+        self._inputs = {}
+        for detail in self.interpreter.get_input_details():
+            key = "image_input" if len(detail["shape"]) == 4 else "feature_input"
+            self._inputs[key] = detail["index"]
+        self._output_index = self.interpreter.get_output_details()[0]["index"]
+
+    def _resize(self, batch_size):
+        if batch_size == self._batch_size:
+            return
+        self.interpreter.resize_tensor_input(self._inputs["image_input"], [batch_size, IMAGE_SIZE[0], IMAGE_SIZE[1], 3])
+        self.interpreter.resize_tensor_input(self._inputs["feature_input"], [batch_size, NUM_FEATURES])
+        self.interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+    @staticmethod
+    def _quantize(detail, values):
+        """Map float inputs onto an integer input tensor (int8 exports)"""
+        if detail["dtype"] == np.float32:
+            return values.astype(np.float32)
+        scale, zero_point = detail["quantization"]
+        info = np.iinfo(detail["dtype"])
+        return np.clip(np.round(values / scale + zero_point), info.min, info.max).astype(detail["dtype"])
+
+    def predict(self, inputs):
+        image_input = np.asarray(inputs["image_input"], dtype=np.float32)
+        feature_input = np.asarray(inputs["feature_input"], dtype=np.float32)
+        with self._lock:
+            self._resize(image_input.shape[0])
+            details = {d["index"]: d for d in self.interpreter.get_input_details()}
+            for key, values in (("image_input", image_input), ("feature_input", feature_input)):
+                index = self._inputs[key]
+                self.interpreter.set_tensor(index, self._quantize(details[index], values))
+            self.interpreter.invoke()
+            output_detail = self.interpreter.get_output_details()[0]
+            output = self.interpreter.get_tensor(self._output_index).copy()
+        if output_detail["dtype"] != np.float32:
+            scale, zero_point = output_detail["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+INFERENCE_BACKENDS = ("keras", "compiled", "tflite")
+
+
+def tflite_path_for(model_path):
+    return os.path.splitext(model_path)[0] + ".tflite"
+
+
+def load_backend(name, model, model_path=None, tflite_path=None, num_threads=None):
+    """Create the configured inference backend for an already loaded Keras model"""
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}' (expected one of {', '.join(INFERENCE_BACKENDS)})")
+    if name == "compiled":
+        return CompiledBackend(model)
+    if name == "tflite":
+        path = tflite_path or tflite_path_for(model_path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"TFLite model not found at {path}; run 'python inference.py convert' first")
+        return TFLiteBackend(path, num_threads=num_threads)
+    return KerasBackend(model)
+
+
+def load_sample_inputs(data_dir="data", limit=32):
+    """CNN tensors from the bundled worksheets, used for calibration and comparison.
+
+    Feature rows are zeros: z-scoring a single sample (normalize_features in
+    app_fixed) always yields zeros, so this matches what the server feeds the model.
+    """
+    import cv2
+
+    paths = []
+    for class_name in ("dysgraphic", "non-dysgraphic"):
+        class_dir = os.path.join(data_dir, class_name)
+        if os.path.isdir(class_dir):
+            paths.extend(
+                os.path.join(class_dir, f) for f in sorted(os.listdir(class_dir))
+                if f.lower().endswith(('.png', '.jpg', '.jpeg'))
+            )
+    images = []
+    for path in paths[:limit]:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        img = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), IMAGE_SIZE)
+        images.append(img.astype(np.float32) / 255.0)
+    if not images:
+        images = [np.random.random((IMAGE_SIZE[0], IMAGE_SIZE[1], 3)).astype(np.float32)]
+    images = np.stack(images)
+    return images, np.zeros((len(images), NUM_FEATURES), dtype=np.float32)
+
+
+def convert_to_tflite(model_path, output_path=None, quantization="none", data_dir="data"):
+    """Export a Keras model to TFLite, optionally with dynamic-range or int8 quantization"""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        images, features = load_sample_inputs(data_dir)
+
+        def representative_dataset():
+            for i in range(len(images)):
+                yield {"image_input": images[i:i + 1], "feature_input": features[i:i + 1]}
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    output_path = output_path or tflite_path_for(model_path)
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    print(f"Wrote {quantization} TFLite model to {output_path}")
+    return output_path
+
+
+def compare_backends(model_path, tflite_path=None, data_dir="data", runs=20, batch_size=1):
+    """Time every available backend on the sample worksheets and check agreement with Keras"""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    images, features = load_sample_inputs(data_dir)
+    tflite_path = tflite_path or tflite_path_for(model_path)
+
+    backends = [KerasBackend(model), CompiledBackend(model)]
+    if os.path.exists(tflite_path):
+        backends.append(TFLiteBackend(tflite_path))
+    else:
+        print(f"Skipping tflite: {tflite_path} not found")
+
+    reference = None
+    report = {}
+    for backend in backends:
+        # Warm up, then time single calls of batch_size images
+        backend.predict({"image_input": images[:batch_size], "feature_input": features[:batch_size]})
+        timings = []
+        for i in range(runs):
+            start = (i * batch_size) % len(images)
+            batch = {"image_input": images[start:start + batch_size], "feature_input": features[start:start + batch_size]}
+            t0 = time.perf_counter()
+            backend.predict(batch)
+            timings.append((time.perf_counter() - t0) * 1000.0)
+
+        outputs = np.concatenate([
+            np.asarray(backend.predict({"image_input": images[i:i + 1], "feature_input": features[i:i + 1]})).reshape(-1)
+            for i in range(len(images))
+        ])
+        if reference is None:
+            reference = outputs
+        report[backend.name] = {
+            "mean_ms": float(np.mean(timings)),
+            "p50_ms": float(np.percentile(timings, 50)),
+            "p95_ms": float(np.percentile(timings, 95)),
+            "label_agreement": float(np.mean((outputs > 0.5) == (reference > 0.5))),
+            "max_abs_diff": float(np.max(np.abs(outputs - reference)))
+        }
+
+    print(f"{'backend':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'agree':>7} {'max diff':>10}")
+    for name, row in report.items():
+        print(f"{name:<10} {row['mean_ms']:>9.2f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+              f"{row['label_agreement']:>7.1%} {row['max_abs_diff']:>10.5f}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MindTrack inference backend tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert_cmd = commands.add_parser("convert", help="Export the Keras model to TFLite")
+    convert_cmd.add_argument("--model", default="dysgraphia_model.keras")
+    convert_cmd.add_argument("--output", default=None)
+    convert_cmd.add_argument("--quantize", choices=("none", "dynamic", "int8"), default="none")
+    convert_cmd.add_argument("--data-dir", default="data")
+
+    compare_cmd = commands.add_parser("compare", help="Latency and agreement report across backends")
+    compare_cmd.add_argument("--model", default="dysgraphia_model.keras")
+    compare_cmd.add_argument("--tflite", default=None)
+    compare_cmd.add_argument("--data-dir", default="data")
+    compare_cmd.add_argument("--runs", type=int, default=20)
+    compare_cmd.add_argument("--batch-size", type=int, default=1)
+    compare_cmd.add_argument("--json", default=None, help="Also write the report to this file")
+
+    args = parser.parse_args()
+    if args.command == "convert":
+        convert_to_tflite(args.model, args.output, args.quantize, args.data_dir)
+    else:
+        result = compare_backends(args.model, args.tflite, args.data_dir, args.runs, args.batch_size)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, indent=2)
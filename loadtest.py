@@ -0,0 +1,455 @@
+"""Local load test: start app_fixed:app and replay synthetic classroom traffic.
+
+Run with:  python loadtest.py --duration 60 --rate 20 --concurrency 16
+           python loadtest.py --server gunicorn --workers 4 --mix "login=20,poll=50,search=10,register=5,predict=15"
+           python loadtest.py --url http://127.0.0.1:5000     # an instance you started yourself
+
+The server runs in a temporary working directory (its own data/ files, the
+model symlinked in), so a run never touches the repository's data. Setup
+registers --teachers teachers with --children children each and one parent
+per teacher; then requests are drawn from the mix:
+
+  login     teacher-login or parent-login
+  register  register-child for a random teacher
+  predict   /api/predict with a worksheet from data/dysgraphic or data/non-dysgraphic;
+            all but --repeat-uploads of them get random bytes appended after the
+            image so they miss the prediction cache and reach the model
+  poll      dashboard-stats, children-by-teacher or child-test-reports, sent
+            with If-None-Match like a polling dashboard
+  search    search-children by a name prefix within a teacher's class
+
+With --rate, requests arrive as a Poisson process at that many per second
+(open loop) and latency is counted from the scheduled arrival, so queueing
+behind a saturated server shows up; --rate 0 runs --concurrency clients
+back to back (closed loop). The report gives throughput and p50/p95/p99
+latency and error rate per route, and can be saved with --json.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DIRS = ("data/dysgraphic", "data/non-dysgraphic")
+DEFAULT_MIX = "login=20,poll=45,search=10,register=5,predict=20"
+PASSWORD = "loadtest-pw"
+
+
+def parse_mix(spec):
+    """'login=20,poll=45' -> (['login', 'poll'], [20.0, 45.0])"""
+    names, weights = [], []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in ACTIONS:
+            raise ValueError(f"Unknown action '{name}' (expected one of {', '.join(ACTIONS)})")
+        names.append(name)
+        weights.append(float(weight or 1))
+    if not names or sum(weights) <= 0:
+        raise ValueError("The mix needs at least one action with a positive weight")
+    return names, weights
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(q / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def load_samples(limit=40):
+    samples = []
+    for directory in SAMPLE_DIRS:
+        path = os.path.join(REPO_DIR, directory)
+        if not os.path.isdir(path):
+            continue
+        for name in sorted(os.listdir(path))[:limit // len(SAMPLE_DIRS)]:
+            if name.lower().endswith(('.png', '.jpg', '.jpeg')):
+                with open(os.path.join(path, name), 'rb') as f:
+                    samples.append((name, f.read()))
+    return samples
+
+
+def multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = b''.join([
+        f'--{boundary}\r\n'.encode(),
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'.encode(),
+        b'Content-Type: application/octet-stream\r\n\r\n',
+        data,
+        f'\r\n--{boundary}--\r\n'.encode(),
+    ])
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+class ServerProcess:
+    """app_fixed:app in a subprocess, with a scratch working directory for its data"""
+
+    def __init__(self, kind, port, workers, threads, env, model_dir=REPO_DIR):
+        self.kind = kind
+        self.port = port
+        self.workdir = tempfile.mkdtemp(prefix="mindtrack-load-")
+        os.makedirs(os.path.join(self.workdir, 'data'))
+        for name in os.listdir(model_dir):
+            if name.endswith(('.keras', '.h5', '.tflite', '_scaler.pkl')):
+                os.symlink(os.path.abspath(os.path.join(model_dir, name)), os.path.join(self.workdir, name))
+        if kind == 'gunicorn':
+            command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '--threads', str(threads),
+                       '-b', f'127.0.0.1:{port}', 'app_fixed:app']
+        else:
+            command = [sys.executable, '-c',
+                       f"from app_fixed import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+        self.log_path = os.path.join(self.workdir, 'server.log')
+        self.log = open(self.log_path, 'wb')
+        env = dict(os.environ, **env, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')])))
+        self.process = subprocess.Popen(command, cwd=self.workdir, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    def wait_ready(self, timeout):
+        """Block until /api/health/ready answers 200 (model loaded or known to be absent)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with {self.process.returncode}; see {self.log_path}")
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+                conn.request('GET', '/api/health/ready')
+                if conn.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError(f"Server not ready after {timeout}s; see {self.log_path}")
+
+    def stop(self, keep=False):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+        if not keep:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class Client:
+    """One keep-alive connection per thread"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        """(status, body bytes, response headers); reconnects once if the kept-alive socket was closed"""
+        for attempt in (0, 1):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                return response.status, response.read(), dict(response.getheaders())
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def post_json(self, path, payload):
+        return self.request('POST', path, json.dumps(payload), {'Content-Type': 'application/json'})
+
+
+class Classroom:
+    """Accounts created during setup, shared by every simulated user"""
+
+    def __init__(self, client, teachers, children, samples, seed, repeat_uploads=0.0):
+        self.client = client
+        self.samples = samples
+        self.repeat_uploads = repeat_uploads
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.run_id = uuid.uuid4().hex[:6]
+        self.teachers = [f"LT{self.run_id}{t:03d}" for t in range(teachers)]
+        self.parents = [f"LP{self.run_id}{t:03d}" for t in range(teachers)]
+        self.children = {teacher: [] for teacher in self.teachers}
+        self.children_per_teacher = children
+        self.next_child = 0
+
+    def setup(self):
+        for teacher, parent in zip(self.teachers, self.parents):
+            self._check(self.client.post_json('/api/teacher-register', {
+                "teacherId": teacher, "teacherName": f"Teacher {teacher}", "school": "Load Test School",
+                "password": PASSWORD}))
+            self._check(self.client.post_json('/api/parent-register', {
+                "parentId": parent, "parentName": f"Parent {parent}", "childId": f"{parent}K",
+                "childName": "Home Child", "password": PASSWORD}))
+            for _ in range(self.children_per_teacher):
+                self._check(self.register_child(teacher, self.rng))
+
+    @staticmethod
+    def _check(result):
+        status, body, _ = result
+        if status != 200:
+            raise RuntimeError(f"Setup request failed with {status}: {body[:200]!r}")
+
+    def new_child_id(self):
+        with self.lock:
+            self.next_child += 1
+            return f"LC{self.run_id}{self.next_child:06d}"
+
+    def register_child(self, teacher, rng):
+        child_id = self.new_child_id()
+        result = self.client.post_json('/api/register-child', {
+            "childId": child_id, "childName": f"Pupil {child_id[-4:]} {rng.choice('ABCDEFGH')}",
+            "age": "8", "grade": "3", "school": "Load Test School", "teacherId": teacher,
+            "teacherName": f"Teacher {teacher}"})
+        if result[0] == 200:
+            with self.lock:
+                self.children[teacher].append(child_id)
+        return result
+
+
+def action_login(classroom, rng, etags):
+    if rng.random() < 0.5:
+        return '/api/teacher-login', classroom.client.post_json(
+            '/api/teacher-login', {"teacherId": rng.choice(classroom.teachers), "password": PASSWORD})
+    return '/api/parent-login', classroom.client.post_json(
+        '/api/parent-login', {"parentId": rng.choice(classroom.parents), "password": PASSWORD})
+
+
+def action_register(classroom, rng, etags):
+    return '/api/register-child', classroom.register_child(rng.choice(classroom.teachers), rng)
+
+
+def action_predict(classroom, rng, etags):
+    filename, data = rng.choice(classroom.samples)
+    if rng.random() >= classroom.repeat_uploads:
+        # Decoders stop at the end-of-image marker, so trailing bytes only change the cache key
+        data += rng.randbytes(16)
+    body, content_type = multipart('image', filename.replace(' ', '_'), data)
+    return '/api/predict', classroom.client.request('POST', '/api/predict', body, {'Content-Type': content_type})
+
+
+POLL_ROUTES = ('/api/dashboard-stats/<teacherId>', '/api/children-by-teacher/<teacherId>',
+               '/api/child-test-reports/<teacherId>')
+
+
+def action_poll(classroom, rng, etags):
+    route = rng.choice(POLL_ROUTES)
+    path = route.replace('<teacherId>', quote(rng.choice(classroom.teachers)))
+    headers = {'Accept-Encoding': 'gzip'}
+    if path in etags:
+        headers['If-None-Match'] = etags[path]
+    result = classroom.client.request('GET', path, headers=headers)
+    etag = result[2].get('ETag')
+    if etag:
+        etags[path] = etag
+    return route, result
+
+
+def action_search(classroom, rng, etags):
+    teacher = rng.choice(classroom.teachers)
+    query = quote(f"pupil {rng.randrange(10)}")
+    return '/api/search-children', classroom.client.request(
+        'GET', f'/api/search-children?q={query}&teacherId={quote(teacher)}&limit=20')
+
+
+ACTIONS = {
+    "login": action_login,
+    "register": action_register,
+    "predict": action_predict,
+    "poll": action_poll,
+    "search": action_search,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.failures = {}
+
+    def record(self, route, seconds, status):
+        with self.lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            counts = self.statuses.setdefault(route, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def fail(self, route, seconds, error):
+        self.record(route, seconds, 'error')
+        with self.lock:
+            errors = self.failures.setdefault(route, {})
+            errors[error] = errors.get(error, 0) + 1
+
+    def report(self, elapsed):
+        rows = []
+        with self.lock:
+            for route in sorted(self.latencies):
+                latencies = sorted(self.latencies[route])
+                statuses = self.statuses[route]
+                # 304 is a successful poll; anything 4xx/5xx or a transport failure is an error
+                errors = sum(n for status, n in statuses.items() if status == 'error' or status >= 400)
+                rows.append({
+                    "route": route,
+                    "requests": len(latencies),
+                    "throughput": len(latencies) / elapsed,
+                    "p50Ms": percentile(latencies, 50) * 1000,
+                    "p95Ms": percentile(latencies, 95) * 1000,
+                    "p99Ms": percentile(latencies, 99) * 1000,
+                    "errorRate": errors / len(latencies),
+                    "statuses": {str(status): n for status, n in statuses.items()},
+                    "failures": self.failures.get(route, {})
+                })
+        total = sum(row["requests"] for row in rows)
+        return {"elapsedSeconds": elapsed, "requests": total, "throughput": total / elapsed, "routes": rows}
+
+
+def drive(classroom, names, weights, args, recorder):
+    """Send traffic for args.duration seconds, open loop at args.rate or closed loop"""
+    stop_at = time.monotonic() + args.duration
+    local = threading.local()
+
+    def one(scheduled, rng):
+        etags = getattr(local, 'etags', None)
+        if etags is None:
+            etags = local.etags = {}
+        action = ACTIONS[rng.choices(names, weights)[0]]
+        route = action.__name__[len('action_'):]
+        try:
+            route, (status, _, _) = action(classroom, rng, etags)
+            recorder.record(route, time.monotonic() - scheduled, status)
+        except Exception as e:
+            recorder.fail(route, time.monotonic() - scheduled, type(e).__name__)
+
+    rng = random.Random(args.seed)
+    if args.rate > 0:
+        with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="load") as pool:
+            next_arrival = time.monotonic()
+            while next_arrival < stop_at:
+                delay = next_arrival - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(one, next_arrival, random.Random(rng.random()))
+                next_arrival += rng.expovariate(args.rate)
+    else:
+        def client_loop(seed):
+            client_rng = random.Random(seed)
+            while time.monotonic() < stop_at:
+                one(time.monotonic(), client_rng)
+
+        threads = [threading.Thread(target=client_loop, args=(rng.random(),), daemon=True)
+                   for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def print_report(report):
+    print(f"\n{report['requests']} requests in {report['elapsedSeconds']:.1f}s "
+          f"({report['throughput']:.1f} req/s)")
+    print(f"{'route':<40} {'reqs':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for row in report["routes"]:
+        print(f"{row['route']:<40} {row['requests']:>7} {row['throughput']:>8.2f} {row['p50Ms']:>9.1f} "
+              f"{row['p95Ms']:>9.1f} {row['p99Ms']:>9.1f} {row['errorRate']:>7.1%}")
+        if row["failures"]:
+            print(f"{'':<40} failures: {row['failures']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay synthetic classroom traffic against a local MindTrack")
+    parser.add_argument("--url", default=None, help="target an already running server instead of starting one")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "werkzeug"), default="auto",
+                        help="how to start app_fixed:app (auto: gunicorn if installed)")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--model-dir", default=REPO_DIR,
+                        help="directory whose model files (.keras/.h5/.tflite, scaler) the server loads")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra environment for the server, e.g. --env INFERENCE_BACKEND=tflite")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic after setup")
+    parser.add_argument("--rate", type=float, default=10.0, help="arrivals per second (0 = closed loop)")
+    parser.add_argument("--concurrency", type=int, default=16, help="max requests in flight / closed-loop clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--repeat-uploads", type=float, default=0.2,
+                        help="share of predict requests that reuse an upload byte for byte (prediction cache hits)")
+    parser.add_argument("--teachers", type=int, default=10)
+    parser.add_argument("--children", type=int, default=25, help="children registered per teacher during setup")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--keep-workdir", action="store_true", help="keep the server's data and log afterwards")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        names, weights = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    samples = load_samples()
+    if 'predict' in names and not samples:
+        parser.error(f"No worksheets found in {' or '.join(SAMPLE_DIRS)} for the predict action")
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        kind = args.server
+        if kind == 'auto':
+            try:
+                import gunicorn  # noqa: F401
+                kind = 'gunicorn'
+            except ImportError:
+                kind = 'werkzeug'
+        port = free_port()
+        env = dict(item.split('=', 1) for item in args.env)
+        print(f"Starting app_fixed:app with {kind} on port {port}")
+        server = ServerProcess(kind, port, args.workers, args.threads, env, args.model_dir)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        if server is not None:
+            server.wait_ready(args.ready_timeout)
+        client = Client(base_url)
+        classroom = Classroom(client, args.teachers, args.children, samples, args.seed, args.repeat_uploads)
+        print(f"Setting up {args.teachers} teachers with {args.children} children each")
+        classroom.setup()
+
+        mode = f"{args.rate:g} req/s open loop" if args.rate > 0 else "closed loop"
+        print(f"Driving {mode}, concurrency {args.concurrency}, for {args.duration:g}s")
+        recorder = Recorder()
+        started = time.monotonic()
+        drive(classroom, names, weights, args, recorder)
+        report = recorder.report(time.monotonic() - started)
+        report["config"] = {key: value for key, value in vars(args).items() if key != 'json'}
+    finally:
+        if server is not None:
+            server.stop(keep=args.keep_workdir)
+            if args.keep_workdir:
+                print(f"Server data and log kept in {server.workdir}")
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Structured, sampled, non-blocking logging for MindTrack.
+
+Records are formatted as one JSON object per line (or plain text) by a
+QueueListener thread, so a request only pays for putting the record on a
+queue. Debug/info records written while handling a request are kept for a
+configurable share of requests per route; warnings and errors always are.
+
+    LOG_LEVEL=DEBUG LOG_SAMPLE_RATES="/api/predict=0.05,*=1" gunicorn app_fixed:app
+"""
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+
+from storage import encode_json
+
+LOGGER_NAME = 'mindtrack'
+
+# Attributes every LogRecord has; anything else was passed through extra= and becomes a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'route'}
+
+# (route, keep debug/info records) for the request being handled in this context
+_request = contextvars.ContextVar('mindtrack_log_request', default=(None, True))
+
+
+def parse_sample_rates(spec):
+    """'/api/predict=0.05,*=1' -> {'/api/predict': 0.05, '*': 1.0}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        route, _, rate = item.rpartition('=')
+        if not route:
+            raise ValueError(f"Bad sample rate '{item}' (expected route=rate)")
+        rate = float(rate)
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Sample rate for {route} must be between 0 and 1")
+        rates[route] = rate
+    return rates
+
+
+class RequestSampler(logging.Filter):
+    """Keep a request's debug/info records for rates[route] of requests (rates['*'] otherwise).
+
+    The decision is made once per request in begin(), so a sampled request's
+    trace is complete rather than a random subset of its lines.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.default_rate = self.rates.pop('*', 1.0)
+
+    def begin(self, route):
+        rate = self.rates.get(route, self.default_rate)
+        _request.set((route, rate >= 1 or random.random() < rate))
+
+    def filter(self, record):
+        route, sampled = _request.get()
+        record.route = route
+        return sampled or record.levelno >= logging.WARNING
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock prepare() formats every record on the caller's thread; here
+    only a traceback is rendered up front (its frames are about to unwind).
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _field_default(value):
+    """numpy scalars/arrays as plain numbers, anything else unknown as its str()"""
+    tolist = getattr(value, 'tolist', None)
+    return tolist() if tolist is not None else str(value)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, 'route', None):
+            entry["route"] = record.route
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return encode_json(entry, default=_field_default).decode('utf-8')
+
+
+def setup_logging(level='INFO', fmt='json', sample_rates='', stream=None):
+    """Configure the 'mindtrack' logger; returns (logger, sampler).
+
+    Handlers run on a background QueueListener that is stopped (and drained)
+    at interpreter exit.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if fmt == 'json':
+        output.setFormatter(JsonFormatter())
+    elif fmt == 'text':
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    else:
+        raise ValueError(f"Unknown log format '{fmt}' (expected json or text)")
+
+    sampler = RequestSampler(parse_sample_rates(sample_rates))
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(sampler)
+    logger.addHandler(handler)
+
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return logger, sampler
+
+
+def redact(fields, secrets=('password',)):
+    """Copy of a request body that is safe to log"""
+    if not isinstance(fields, dict):
+        return fields
+    return {key: '***' if key in secrets else value for key, value in fields.items()}
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask.json.provider import DefaultJSONProvider
+
+from storage import decode_json, encode_json, json_default
+
+try:
+    import brotli
+except ImportError:  # optional: responses are only gzip-compressed without it
+    brotli = None
+
+
+def body_etag(body):
+    """Content hash of a serialized body, so every worker gives the same data the same tag"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """LRU of serialized response bodies, one entry per cache key, valid for one data version.
+
+    A key is whatever identifies the response (path plus query string); the
+    version is the index's counter for the data behind it. A lookup with a
+    newer version is a miss, and the next put replaces the stale body. Every
+    page and limit is its own key, so the cache is bounded by total body
+    bytes as well as by entries (max_bytes=0: entries only).
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """(etag, body) cached for key at this version, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, body):
+        """Cache body for key at version; returns (etag, body)"""
+        etag = body_etag(body)
+        if self.max_entries and (not self.max_bytes or len(body) <= self.max_bytes):
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= len(old[2])
+                self._entries[key] = (version, etag, body)
+                self._bytes += len(body)
+                while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                    _, (_, _, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return etag, body
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by storage.encode_json (orjson when installed).
+
+    Output keeps Flask's conventions (sorted keys, compact unless debugging,
+    the app's default() for other types) but non-ASCII text is sent as UTF-8
+    rather than \\u escapes. Containers that serialize themselves through
+    to_json() (history.TestHistory) are encoded as the lists they stand for.
+    """
+
+    @staticmethod
+    def default(value):
+        if hasattr(value, 'to_json'):
+            return json_default(value)
+        return DefaultJSONProvider.default(value)
+
+    def _encode(self, obj, indent=None):
+        return encode_json(obj, indent=indent, sort_keys=self.sort_keys, default=self.default)
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return decode_json(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._encode(obj, indent=2 if pretty else None) + b"\n", mimetype=self.mimetype)
+
+
+class Compressor:
+    """Negotiated gzip/brotli compression of response bodies above a size threshold.
+
+    Compressed bodies of responses that carry an ETag are kept in a small LRU,
+    so a body cached by ResponseCache is also compressed only once.
+    """
+
+    def __init__(self, min_bytes=1024, gzip_level=6, brotli_quality=5, max_entries=256):
+        self.min_bytes = int(min_bytes)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.max_entries = max(0, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def negotiate(self, accept_encodings):
+        """Best encoding the client accepts (werkzeug Accept header), or None"""
+        best = None
+        for encoding in self.encodings:
+            quality = accept_encodings[encoding]
+            if quality > 0 and (best is None or quality > best[1]):
+                best = (encoding, quality)
+        return best[0] if best else None
+
+    def compress(self, body, encoding, etag=None):
+        key = (etag, encoding)
+        if etag is not None:
+            with self._lock:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    return cached
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        if etag is not None and self.max_entries:
+            with self._lock:
+                self._entries[key] = compressed
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return compressed
@@ -0,0 +1,849 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single worker there
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional: the standard json module is used instead
+    orjson = None
+
+log = logging.getLogger('mindtrack')
+
+# Journal records describe one change each, so a write costs O(size of change):
+#   {"op": "set",    "key": k, "value": record}            insert or replace a record
+#   {"op": "update", "key": k, "fields": {...}}            merge fields into a record
+#   {"op": "append", "value": record}                      append to a list dataset
+#   {"op": "push",   "key": k, "field": f, "value": item,  append to a record's nested list
+#                    "fields": {...}, "item_key": name}    (and merge fields)
+# Replay is idempotent, so records that were already folded into the snapshot
+# by an interrupted compaction can safely be applied again: an append is
+# skipped when a record with the same key_field value exists, a push when the
+# nested list already holds an item with the same item_key value.
+# The sqlite change log also records {"op": "reload"} when a whole dataset is
+# replaced; readers then load it again instead of applying records. Stores'
+# refresh() and save() return the records they applied from other workers,
+# or [reload_record()] when they had to reload the data instead, so callers
+# can update anything derived from the data (indexes) incrementally.
+
+
+def set_record(key, value):
+    return {"op": "set", "key": key, "value": value}
+
+def update_record(key, fields):
+    return {"op": "update", "key": key, "fields": fields}
+
+def append_record(value):
+    return {"op": "append", "value": value}
+
+def reload_record():
+    return {"op": "reload"}
+
+def push_record(key, field, value, fields=None, item_key=None):
+    record = {"op": "push", "key": key, "field": field, "value": value, "fields": fields or {}}
+    if item_key is not None:
+        record["item_key"] = item_key
+    return record
+
+
+def json_default(value):
+    """Let in-memory containers (history.TestHistory) serialize themselves via to_json()"""
+    to_json = getattr(value, 'to_json', None)
+    if to_json is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_json()
+
+
+def encode_json(value, indent=None, sort_keys=False, default=json_default):
+    """Serialize to UTF-8 bytes, compact unless indent=2; uses orjson when it is installed.
+
+    datetimes and dataclasses go through default as they do with the json
+    module. Anything orjson refuses (integers over 64 bits) falls back to json.
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(value, default=default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    separators = (',', ':') if indent is None else None
+    return json.dumps(value, indent=indent, separators=separators, sort_keys=sort_keys, default=default).encode('utf-8')
+
+
+def encode_text(value):
+    return encode_json(value).decode('utf-8')
+
+
+def decode_json(data):
+    """Parse JSON text or bytes (orjson when installed; json for what it rejects, like NaN)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def write_json_atomic(path, data, indent=None):
+    """Write JSON to a temp file and rename it over path, so readers never see a partial file"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_json(data, indent=indent))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RecordLocator:
+    """Find records by key in a dict dataset, or by key_field in a list dataset"""
+
+    def __init__(self, data, key_field):
+        self.data = data
+        self.key_field = key_field
+        self.positions = None
+        if isinstance(data, list):
+            self.positions = {record.get(key_field): i for i, record in enumerate(data) if isinstance(record, dict)}
+
+    def get(self, key):
+        if self.positions is None:
+            return self.data.get(key)
+        index = self.positions.get(key)
+        return self.data[index] if index is not None else None
+
+    def put(self, key, value):
+        if self.positions is None:
+            self.data[key] = value
+            return
+        index = self.positions.get(key)
+        if index is None:
+            self.positions[key] = len(self.data)
+            self.data.append(value)
+        else:
+            self.data[index] = value
+
+    def append(self, value):
+        """Append a record to a list dataset unless one with the same key is already there"""
+        key = value.get(self.key_field) if isinstance(value, dict) else None
+        if key is not None:
+            if key in self.positions:
+                return False
+            self.positions[key] = len(self.data)
+        self.data.append(value)
+        return True
+
+
+def contains_item(items, item_key, item_id):
+    """Whether a nested list (or TestHistory) holds an item whose item_key is item_id"""
+    return any(isinstance(item, dict) and item.get(item_key) == item_id for item in items)
+
+
+def apply_record(locator, record):
+    """Apply one journal record to the dataset behind locator"""
+    op = record.get("op")
+    if op == "set":
+        locator.put(record["key"], record["value"])
+    elif op == "update":
+        target = locator.get(record["key"])
+        if target is not None:
+            target.update(record["fields"])
+    elif op == "append":
+        locator.append(record["value"])
+    elif op == "push":
+        target = locator.get(record["key"])
+        if target is not None:
+            items = target.setdefault(record["field"], [])
+            value, item_key = record["value"], record.get("item_key")
+            item_id = value.get(item_key) if item_key and isinstance(value, dict) else None
+            if item_id is None or not contains_item(items, item_key, item_id):
+                items.append(value)
+            target.update(record.get("fields") or {})
+
+
+class FileLock:
+    """Advisory flock on a side file, so gunicorn workers take turns; re-entrant within a process.
+
+    The file is opened on every outermost acquire: flock belongs to the open file
+    description, which forked workers would otherwise share.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+def replace_contents(data, new):
+    """Swap new contents into data in place, so the module globals holding it stay valid"""
+    if isinstance(data, dict):
+        for key in [key for key in data if key not in new]:
+            del data[key]
+        data.update(new)
+    else:
+        data[:] = new
+
+
+def file_identity(path):
+    """(inode, mtime, size) of path, or None if it does not exist; changes on every replace"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class JsonStore:
+    """Whole-file JSON storage: every save rewrites the file.
+
+    Several workers can share the file: writes happen under an advisory lock
+    (data/<name>.lock), and refresh() reloads only when the file's identity changed.
+    """
+
+    def __init__(self, path, default_factory, key_field=None, indent=None):
+        self.path = path
+        self.default_factory = default_factory
+        self.key_field = key_field
+        self.indent = indent
+        self.lock = FileLock(os.path.splitext(path)[0] + '.lock')
+        self._snapshot_id = None
+        # Records applied off the request path (background compaction), not yet returned by refresh()
+        self._unreported = []
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                self._snapshot_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+                return decode_json(f.read())
+        except FileNotFoundError:
+            self._snapshot_id = None
+            return self.default_factory()
+
+    def load(self):
+        with self.lock:
+            return self._read()
+
+    def changed(self):
+        """Cheap check (one stat) for writes by other workers since we last read"""
+        return file_identity(self.path) != self._snapshot_id
+
+    def _catch_up(self, data):
+        if not self.changed():
+            return []
+        replace_contents(data, self._read())
+        return [reload_record()]
+
+    def _take_unreported(self):
+        records, self._unreported = self._unreported, []
+        return records
+
+    def refresh(self, data):
+        """Bring data up to date with other workers' writes; returns the records applied"""
+        if not self.changed() and not self._unreported:
+            return []
+        with self.lock:
+            return self._take_unreported() + self._catch_up(data)
+
+    def _reapply(self, data, changes):
+        locator = RecordLocator(data, self.key_field)
+        for change in changes:
+            apply_record(locator, change)
+
+    def save(self, data, changes=()):
+        """Write data; returns the records of other workers that had to be merged in first"""
+        with self.lock:
+            merged = self._take_unreported() + (self._catch_up(data) if changes else [])
+            if merged:
+                self._reapply(data, changes)
+            write_json_atomic(self.path, data, indent=self.indent)
+            self._snapshot_id = file_identity(self.path)
+            return merged
+
+
+class JournalStore(JsonStore):
+    """JSON snapshot plus an append-only journal of changes, compacted in the background.
+
+    The snapshot keeps the plain data/<name>.json format, so the files stay
+    readable and switching back to the json backend needs no migration. Each
+    worker remembers how far into the journal it has read, so picking up
+    another worker's writes costs only the new records.
+    """
+
+    def __init__(self, path, default_factory, key_field=None, indent=None, compact_bytes=1024 * 1024):
+        super().__init__(path, default_factory, key_field, indent)
+        self.journal_path = os.path.splitext(path)[0] + '.journal'
+        self.compact_bytes = compact_bytes
+        self._compacting = False
+        self._journal_offset = 0
+
+    def _replay(self, data, path, offset=0):
+        """Apply complete records from path starting at offset; returns (records, end offset)"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return [], 0
+        locator = RecordLocator(data, self.key_field)
+        records = []
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # A record still being written, or torn by a crash: stop before it
+                    break
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = decode_json(line)
+                except ValueError:
+                    log.warning("Skipping unreadable journal record in %s", path)
+                    continue
+                apply_record(locator, record)
+                records.append(record)
+        return records, offset
+
+    def _read(self):
+        data = super()._read()
+        records, self._journal_offset = self._replay(data, self.journal_path)
+        if records:
+            log.info("Replayed %d journal records into %s", len(records), self.path)
+        return data
+
+    def _journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def changed(self):
+        return super().changed() or self._journal_size() != self._journal_offset
+
+    def _catch_up(self, data):
+        if super().changed() or self._journal_size() < self._journal_offset:
+            # Another worker compacted: start again from its snapshot
+            replace_contents(data, self._read())
+            return [reload_record()]
+        records, self._journal_offset = self._replay(data, self.journal_path, self._journal_offset)
+        return records
+
+    def save(self, data, changes=()):
+        """Append changes to the journal; with no changes, write a fresh snapshot of data"""
+        if not changes:
+            self.compact(data, merge=False)
+            return []
+        lines = b''.join(encode_json(change) + b'\n' for change in changes)
+        with self.lock:
+            merged = self._take_unreported() + self._catch_up(data)
+            if merged:
+                self._reapply(data, changes)
+            with open(self.journal_path, 'ab') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+                self._journal_offset = f.tell()
+            if self._journal_offset < self.compact_bytes or self._compacting:
+                return merged
+            self._compacting = True
+        threading.Thread(target=self._compact_in_background, args=(data,), name="journal-compact", daemon=True).start()
+        return merged
+
+    def _compact_in_background(self, data):
+        try:
+            self.compact(data)
+        except Exception:
+            log.exception("Error compacting %s", self.journal_path)
+        finally:
+            self._compacting = False
+
+    def compact(self, data, merge=True):
+        """Fold the journal into a fresh snapshot, then delete the journal.
+
+        Runs entirely under the lock, so no worker can journal a record between
+        the snapshot being written and the journal being deleted.
+        """
+        with self.lock:
+            if merge:
+                self._unreported.extend(self._catch_up(data))
+            write_json_atomic(self.path, data, indent=self.indent)
+            self._snapshot_id = file_identity(self.path)
+            # Replaying the journal onto the new snapshot is harmless, so a crash here loses nothing
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_offset = 0
+
+
+class SqliteDatabase:
+    """One SQLite file (WAL mode) holding every dataset, with a connection per thread.
+
+    SQLite is the persistence layer only: workers read the tables once and
+    answer lookups from their in-memory indexes (indexes.ChildIndex), so the
+    only SQL indexes are the ones the write paths query.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS parents (
+            parentId TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS teachers (
+            teacherId TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS children (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            childId TEXT NOT NULL UNIQUE,
+            teacherId TEXT,
+            status TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS test_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            childId TEXT NOT NULL REFERENCES children (childId),
+            testId TEXT,
+            testDate TEXT,
+            prediction TEXT,
+            confidence REAL,
+            teacherId TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_test_results_child ON test_results (childId, testDate);
+        CREATE TABLE IF NOT EXISTS teacher_reports (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            reportId TEXT,
+            teacherId TEXT,
+            childId TEXT,
+            status TEXT,
+            reportDate TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_reports_id ON teacher_reports (reportId);
+        CREATE TABLE IF NOT EXISTS changes (
+            name TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (name, seq)
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self.connection().executescript(self.SCHEMA)
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, so concurrent workers serialize their writes"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SqliteStore:
+    """One dataset stored in SQLite; test results live in their own table.
+
+    Every write also appends its journal records to the dataset's change log
+    (the changes table), in the same transaction. Other workers notice with
+    one primary-key lookup and apply just the records they have not seen;
+    a worker that fell behind the trimmed log, or a whole-dataset save,
+    makes them read the tables again.
+    """
+
+    # Change records kept per dataset
+    CHANGE_LOG_SIZE = 10000
+
+    def __init__(self, db, name, json_path, default_factory, key_field=None):
+        self.db = db
+        self.name = name
+        self.path = json_path
+        self.default_factory = default_factory
+        self.key_field = key_field
+        self.lock = FileLock(os.path.splitext(json_path)[0] + '.lock')
+        self._seq = None
+
+    def _last_seq(self, conn):
+        row = conn.execute("SELECT MAX(seq) FROM changes WHERE name = ?", (self.name,)).fetchone()
+        return row[0] or 0
+
+    def _log(self, conn, records):
+        """Append records to the change log, trimming it; returns the last sequence number"""
+        seq = self._last_seq(conn)
+        conn.executemany("INSERT INTO changes (name, seq, record) VALUES (?, ?, ?)",
+                         [(self.name, seq + i, encode_text(record)) for i, record in enumerate(records, 1)])
+        seq += len(records)
+        conn.execute("DELETE FROM changes WHERE name = ? AND seq <= ?", (self.name, seq - self.CHANGE_LOG_SIZE))
+        return seq
+
+    def _catch_up(self, conn, data):
+        """Bring data up to date with the change log; returns the records applied"""
+        rows = conn.execute("SELECT seq, record FROM changes WHERE name = ? AND seq > ? ORDER BY seq",
+                            (self.name, self._seq)).fetchall()
+        if not rows:
+            return []
+        records = [decode_json(record) for _, record in rows]
+        behind = rows[0][0] != self._seq + 1
+        self._seq = rows[-1][0]
+        if behind or any(record.get("op") == "reload" for record in records):
+            replace_contents(data, self._read(conn))
+            return [reload_record()]
+        locator = RecordLocator(data, self.key_field)
+        for record in records:
+            apply_record(locator, record)
+        return records
+
+    # Row <-> record helpers
+    def _dict_key_column(self):
+        return "parentId" if self.name == "parents" else "teacherId"
+
+    def _write_child(self, conn, child):
+        # testResults go to their own table; the row keeps an empty stub so the record shape survives
+        child = dict(child)
+        tests = child.get('testResults')
+        if tests is not None:
+            child['testResults'] = []
+        conn.execute(
+            "INSERT INTO children (childId, teacherId, status, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(childId) DO UPDATE SET teacherId = excluded.teacherId, status = excluded.status, data = excluded.data",
+            (child.get('childId'), child.get('teacherId'), child.get('status', 'Active'), encode_text(child))
+        )
+        conn.execute("DELETE FROM test_results WHERE childId = ?", (child.get('childId'),))
+        for test in tests or []:
+            self._write_test(conn, child.get('childId'), test)
+
+    def _write_test(self, conn, child_id, test):
+        conn.execute(
+            "INSERT INTO test_results (childId, testId, testDate, prediction, confidence, teacherId, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (child_id, test.get('testId'), test.get('testDate'), test.get('prediction'),
+             test.get('confidence') if isinstance(test.get('confidence'), (int, float)) else None,
+             test.get('teacherId'), encode_text(test))
+        )
+
+    def _write_report(self, conn, report):
+        conn.execute(
+            "INSERT INTO teacher_reports (reportId, teacherId, childId, status, reportDate, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (report.get('reportId'), report.get('teacherId'), report.get('childId'),
+             report.get('status'), report.get('reportDate'), encode_text(report))
+        )
+
+    def _read(self, conn):
+        if self.name in ("parents", "teachers"):
+            key = self._dict_key_column()
+            return {row[0]: decode_json(row[1]) for row in conn.execute(f"SELECT {key}, data FROM {self.name}")}
+        if self.name == "teacher_reports":
+            return [decode_json(row[0]) for row in conn.execute("SELECT data FROM teacher_reports ORDER BY seq")]
+
+        tests = {}
+        for child_id, data in conn.execute("SELECT childId, data FROM test_results ORDER BY id"):
+            tests.setdefault(child_id, []).append(decode_json(data))
+        children = []
+        for child_id, data in conn.execute("SELECT childId, data FROM children ORDER BY seq"):
+            child = decode_json(data)
+            if 'testResults' in child or child_id in tests:
+                child['testResults'] = tests.get(child_id, [])
+            children.append(child)
+        return children
+
+    def _count(self, conn):
+        return conn.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+    def _replace_all(self, conn, data):
+        if self.name in ("parents", "teachers"):
+            conn.execute(f"DELETE FROM {self.name}")
+            key = self._dict_key_column()
+            conn.executemany(
+                f"INSERT INTO {self.name} ({key}, data) VALUES (?, ?)",
+                [(k, encode_text(v)) for k, v in data.items()]
+            )
+        elif self.name == "teacher_reports":
+            conn.execute("DELETE FROM teacher_reports")
+            for report in data:
+                self._write_report(conn, report)
+        else:
+            conn.execute("DELETE FROM test_results")
+            conn.execute("DELETE FROM children")
+            for child in data:
+                self._write_child(conn, child)
+
+    def load(self):
+        with self.lock, self.db.transaction() as conn:
+            # One-shot import of the JSON files the first time a dataset is opened
+            if self._count(conn) == 0 and os.path.exists(self.path):
+                # _read, not load: we already hold data/<name>.lock, which the JSON store shares
+                legacy = JournalStore(self.path, self.default_factory, self.key_field)._read()
+                if legacy:
+                    self._replace_all(conn, legacy)
+                    self._log(conn, [reload_record()])
+                    log.info("Migrated %d %s records from %s into %s", len(legacy), self.name, self.path, self.db.path)
+            self._seq = self._last_seq(conn)
+            return self._read(conn)
+
+    def changed(self):
+        return self._last_seq(self.db.connection()) != self._seq
+
+    def refresh(self, data):
+        """Apply other workers' changes to data in place; returns the records applied"""
+        if not self.changed():
+            return []
+        with self.lock, self.db.transaction() as conn:
+            return self._catch_up(conn, data)
+
+    def _apply(self, conn, change):
+        op = change.get("op")
+        if self.name in ("parents", "teachers"):
+            key = self._dict_key_column()
+            if op == "set":
+                conn.execute(f"INSERT OR REPLACE INTO {self.name} ({key}, data) VALUES (?, ?)",
+                             (change["key"], encode_text(change["value"])))
+            elif op == "update":
+                row = conn.execute(f"SELECT data FROM {self.name} WHERE {key} = ?", (change["key"],)).fetchone()
+                if row is not None:
+                    record = decode_json(row[0])
+                    record.update(change["fields"])
+                    conn.execute(f"UPDATE {self.name} SET data = ? WHERE {key} = ?", (encode_text(record), change["key"]))
+            return
+
+        if self.name == "teacher_reports":
+            if op in ("append", "set"):
+                self._write_report(conn, change["value"])
+            elif op == "update":
+                row = conn.execute("SELECT seq, data FROM teacher_reports WHERE reportId = ? ORDER BY seq DESC LIMIT 1",
+                                   (change["key"],)).fetchone()
+                if row is not None:
+                    record = decode_json(row[1])
+                    record.update(change["fields"])
+                    conn.execute("UPDATE teacher_reports SET status = ?, data = ? WHERE seq = ?",
+                                 (record.get('status'), encode_text(record), row[0]))
+            return
+
+        if op in ("set", "append"):
+            self._write_child(conn, change["value"])
+        elif op in ("update", "push"):
+            row = conn.execute("SELECT data FROM children WHERE childId = ?", (change["key"],)).fetchone()
+            if row is None:
+                return
+            child = decode_json(row[0])
+            if op == "push":
+                child[change["field"]] = []
+                self._write_test(conn, change["key"], change["value"])
+            child.update(change.get("fields") or {})
+            conn.execute("UPDATE children SET teacherId = ?, status = ?, data = ? WHERE childId = ?",
+                         (child.get('teacherId'), child.get('status', 'Active'), encode_text(child), change["key"]))
+
+    def save(self, data, changes=()):
+        """Apply changes in one transaction; with no changes, replace the whole dataset.
+
+        Returns the records of other workers that were written in the meantime;
+        they are applied to data first and ours again on top.
+        """
+        with self.lock, self.db.transaction() as conn:
+            if not changes:
+                self._replace_all(conn, data)
+                self._seq = self._log(conn, [reload_record()])
+                return []
+            merged = self._catch_up(conn, data)
+            for change in changes:
+                self._apply(conn, change)
+            self._seq = self._log(conn, changes)
+            if merged:
+                locator = RecordLocator(data, self.key_field)
+                for change in changes:
+                    apply_record(locator, change)
+            return merged
+
+
+class GroupCommit:
+    """Coalesce low-priority changes to one dataset and write them in batches.
+
+    defer() applies nothing itself (the caller has already updated data in
+    memory); it queues the journal records, merging repeated updates to the same
+    record, and writes them once per interval or when max_pending records are
+    queued. commit() is the durable path: it writes the queued records and its
+    own in one save, in order, before returning. Everything still queued is
+    flushed at interpreter exit.
+    """
+
+    def __init__(self, store, data, interval=2.0, max_pending=100):
+        self.store = store
+        self.data = data
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._serial = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def defer(self, *changes):
+        if self.interval <= 0:
+            self.commit(*changes)
+            return
+        with self._lock:
+            for change in changes:
+                if change.get("op") == "update" and ("update", change["key"]) in self._pending:
+                    merged = self._pending[("update", change["key"])]
+                    merged["fields"] = {**merged["fields"], **change["fields"]}
+                    continue
+                if change.get("op") == "update":
+                    key = ("update", change["key"])
+                else:
+                    self._serial += 1
+                    key = (change.get("op"), self._serial)
+                self._pending[key] = dict(change)
+            full = len(self._pending) >= self.max_pending
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def _take(self):
+        with self._lock:
+            changes = list(self._pending.values())
+            self._pending.clear()
+        return changes
+
+    def commit(self, *changes):
+        """Write queued and given changes now; with no changes at all, save the whole dataset"""
+        with self.store.lock:
+            pending = self._take()
+            # A whole-dataset save already includes the queued changes applied in memory
+            self._save(pending + list(changes) if changes else [])
+
+    def flush(self):
+        # Idle workers must not contend with writers for the store lock every interval
+        with self._lock:
+            if not self._pending:
+                return
+        with self.store.lock:
+            pending = self._take()
+            if pending:
+                self._save(pending)
+
+    def refresh(self):
+        """Pick up other workers' changes, keeping queued changes applied; returns the records applied"""
+        changes = self.store.refresh(self.data)
+        if not changes:
+            return changes
+        with self._lock:
+            pending = list(self._pending.values())
+        self._reapply(pending)
+        return changes
+
+    def _save(self, changes):
+        self.store.save(self.data, changes)
+        # A reload from another worker's writes may have replaced our in-memory copies
+        self._reapply(changes)
+
+    def _reapply(self, changes):
+        if changes:
+            locator = RecordLocator(self.data, self.store.key_field)
+            for change in changes:
+                apply_record(locator, change)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Error flushing deferred writes to %s", self.store.path)
+
+
+STORAGE_BACKENDS = ("json", "journal", "sqlite")
+
+_databases = {}
+
+
+def open_store(backend, path, default_factory, key_field=None, compact_bytes=1024 * 1024, sqlite_path='data/mindtrack.db'):
+    """Create the storage engine for one dataset"""
+    if backend == "json":
+        return JsonStore(path, default_factory, key_field)
+    if backend == "journal":
+        return JournalStore(path, default_factory, key_field, compact_bytes=compact_bytes)
+    if backend == "sqlite":
+        if sqlite_path not in _databases:
+            _databases[sqlite_path] = SqliteDatabase(sqlite_path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        return SqliteStore(_databases[sqlite_path], name, path, default_factory, key_field)
+    raise ValueError(f"Unknown storage backend '{backend}' (expected one of {', '.join(STORAGE_BACKENDS)})")
+
+
+DATASETS = (
+    ("parents", dict, None),
+    ("teachers", dict, None),
+    ("children", list, "childId"),
+    ("teacher_reports", list, "reportId"),
+)
+
+
+def migrate_json_to_sqlite(data_dir='data', sqlite_path='data/mindtrack.db'):
+    """One-shot copy of the JSON (and journal) datasets into SQLite, replacing its contents"""
+    for name, factory, key_field in DATASETS:
+        json_path = os.path.join(data_dir, f"{name}.json")
+        data = JournalStore(json_path, factory, key_field).load()
+        open_store("sqlite", json_path, factory, key_field, sqlite_path=sqlite_path).save(data)
+        print(f"{name}: {len(data)} records -> {sqlite_path}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MindTrack storage tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = commands.add_parser("migrate", help="Copy data/*.json into a SQLite database")
+    migrate_cmd.add_argument("--data-dir", default="data")
+    migrate_cmd.add_argument("--db", default="data/mindtrack.db")
+    args = parser.parse_args()
+    if args.command == "migrate":
+        migrate_json_to_sqlite(args.data_dir, args.db)